@@ -0,0 +1,72 @@
+import argparse
+import gc
+import time
+import tracemalloc
+
+from src.browser import HTMLParser
+
+NODES = 1_000_000
+CHUNK_SIZE = 64 * 1024
+
+
+def sample_document(nodes=NODES):
+    # Every list item is an element holding one text node
+    items = (nodes - 3) // 2
+    return "<ul>" + "<li class=item>word</li>" * items + "</ul>"
+
+
+def count_nodes(root):
+    count, stack = 0, [root]
+    while stack:
+        node = stack.pop()
+        count += 1
+        stack.extend(node.children)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.dom")
+    parser.add_argument("--nodes", type=int, default=NODES)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    body = sample_document(args.nodes)
+    gc.collect()
+    # Everything the parse leaves behind belongs to the tree: nodes, child
+    # lists, attribute dicts and text
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    html = HTMLParser()
+    for start in range(0, len(body), CHUNK_SIZE):
+        html.feed(body[start : start + CHUNK_SIZE])
+    root = html.close()
+    del html
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del body
+
+    nodes = count_nodes(root)
+    print("{} nodes: {:.1f} bytes/node".format(nodes, size / nodes))
+
+    pause = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        gc.collect()
+        pause = min(pause, time.perf_counter() - start)
+    print("full collection with the tree alive: {:.1f} ms".format(pause * 1000))
+
+    start = time.perf_counter()
+    del root
+    freed = time.perf_counter() - start
+    start = time.perf_counter()
+    collected = gc.collect()
+    collection = time.perf_counter() - start
+    print(
+        "dropping the tree: {:.1f} ms, then a collection of {:.1f} ms "
+        "that finds {} objects".format(freed * 1000, collection * 1000, collected)
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import argparse
+import time
+
+from src.browser import HTMLParser
+
+SAMPLE_SIZE = 2 * 1024 * 1024
+SAMPLE_SECTION = """<div class="chapter" id="c{0}">
+<h2>Chapter {0} &mdash; 第{0}回</h2>
+<!-- chapter {0} starts here -->
+<p>Monkey &amp; Pigsy travel west &#x2665; with <b>Tripitaka</b> and
+<i>Sandy</i>. 話說那孫行者 &lt;text&gt; <a href="/chapter/{0}">next&nbsp;page</a></p>
+<ul><li>one</li><li>two</li><li>three</li></ul>
+<img src="/img/{0}.png" alt="illustration"><br>
+</div>
+"""
+
+
+def sample_document(size=SAMPLE_SIZE):
+    sections = []
+    length = 0
+    while length < size:
+        sections.append(SAMPLE_SECTION.format(len(sections)))
+        length += len(sections[-1].encode("utf8"))
+    return "<!doctype html><html><body>" + "".join(sections) + "</body></html>"
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.parser")
+    parser.add_argument("path", nargs="?", help="HTML file to parse instead")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--size", type=int, default=SAMPLE_SIZE, help="bytes of sample HTML"
+    )
+    args = parser.parse_args()
+
+    if args.path:
+        with open(args.path, encoding="utf8", errors="replace") as file:
+            body = file.read()
+    else:
+        body = sample_document(args.size)
+    megabytes = len(body.encode("utf8")) / 1_000_000
+
+    best = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        HTMLParser(body).parse()
+        best = min(best, time.perf_counter() - start)
+    print(
+        "{:.1f} MB in {:.3f} s: {:.2f} MB/s".format(megabytes, best, megabytes / best)
+    )
+
+
+if __name__ == "__main__":
+    main()
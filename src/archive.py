@@ -0,0 +1,105 @@
+import base64
+import json
+import os
+import threading
+import time
+
+from .data import errors
+from .disk_cache import write_atomic
+
+ARCHIVE_VERSION = 1
+REPLAY_CHUNK_SIZE = 16 * 1024
+# The replayed response always carries its whole body, so these no longer apply
+FRAMING_HEADERS = ["connection", "content-length", "keep-alive", "transfer-encoding"]
+
+
+class ReplaySocket:
+    def __init__(self, data, latency=0, bandwidth=None):
+        self.data = memoryview(data)
+        self.position = 0
+        self.latency = latency
+        self.bandwidth = bandwidth
+
+    def sendall(self, data):
+        pass
+
+    def recv_into(self, buffer):
+        if self.latency:
+            time.sleep(self.latency)
+            self.latency = 0
+        size = min(len(buffer), len(self.data) - self.position)
+        if self.bandwidth:
+            size = min(size, REPLAY_CHUNK_SIZE)
+            time.sleep(size / self.bandwidth)
+        buffer[:size] = self.data[self.position : self.position + size]
+        self.position += size
+        return size
+
+
+class Archive:
+    def __init__(self):
+        self.mode = None
+        self.path = None
+        self.entries = {}
+        self.latency = 0
+        self.bandwidth = None
+        self.lock = threading.Lock()
+
+    def record(self, path):
+        self.mode, self.path, self.entries = "record", path, {}
+
+    def replay(self, path, latency=0, bandwidth=None):
+        with open(path) as file:
+            archive = json.load(file)
+        if archive.get("version") != ARCHIVE_VERSION:
+            raise ValueError("Unsupported archive version")
+        self.mode, self.path, self.entries = "replay", path, archive["entries"]
+        self.latency, self.bandwidth = latency, bandwidth
+
+    def stop(self):  # noqa: vulture
+        self.mode, self.path, self.entries = None, None, {}
+        self.latency, self.bandwidth = 0, None
+
+    def save(self):
+        with self.lock:
+            data = json.dumps({"version": ARCHIVE_VERSION, "entries": self.entries})
+        directory = os.path.dirname(os.path.abspath(self.path))
+        write_atomic(directory, self.path, data.encode("utf8"))
+
+    def capture(self, url, status, headers, body):
+        if self.mode != "record":
+            return body
+        return self.recorded(str(url), status, headers, body)
+
+    def recorded(self, key, status, headers, body):
+        # Keep the body as it came off the wire, still compressed, so replay
+        # goes through the same decoding as a live load
+        chunks = []
+        for chunk in body:
+            chunks.append(chunk)
+            yield chunk
+        with self.lock:
+            self.entries[key] = {
+                "status": status,
+                "headers": headers,
+                "body": base64.b64encode(b"".join(chunks)).decode("ascii"),
+            }
+
+    def open(self, url):
+        entry = self.entries.get(str(url))
+        if entry is None:
+            status, headers = 504, {"content-type": "text/html"}
+            body = errors.not_archived.encode("utf8")
+        else:
+            status, headers = entry["status"], entry["headers"]
+            body = base64.b64decode(entry["body"])
+
+        head = "HTTP/1.1 {} Replayed\r\n".format(status)
+        for name, value in headers.items():
+            if name not in FRAMING_HEADERS:
+                head += "{}: {}\r\n".format(name, value)
+        head += "content-length: {}\r\n\r\n".format(len(body))
+        return ReplaySocket(head.encode("latin-1") + body, self.latency, self.bandwidth)
+
+
+archive = Archive()
@@ -1,127 +1,428 @@
 from __future__ import annotations
-import socket
-import ssl
+import functools
+import queue
+import re
+import threading
+import time
 import tkinter
 import tkinter.font
-from typing import Dict
-from dataclasses import dataclass, field
+import weakref
 
 from src.data import errors
-from src.data.entities import entities
 
-from .data.headers import stringify_headers
+from .archive import archive
+from .cache import CacheEntry
+from .chunked import read_chunked
+from .compression import decode_content
+from .connection import pool
+from .data.headers import encode_headers, request_headers
+from .data_url import read_data_url
+from .disk_cache import lookup, store
 from .file import read_file
+from .http2 import h2_connections
+from .http2 import request_headers as h2_request_headers
+from .prefetch import Prefetcher
+from .redirects import (
+    MAX_REDIRECTS,
+    is_redirect,
+    permanent_redirects,
+    redirect_target,
+)
+from .response import (
+    ResponseReader,
+    ResponseTooLarge,
+    TextStream,
+    has_body,
+    read_body,
+)
+from .timing import timings
+from .tokenizer import Characters, EndTag, HTMLTokenizer, StartTag
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+SCHEME = re.compile(r"[a-zA-Z][a-zA-Z0-9+.-]*:")
+AUTHORITY = re.compile(r"([^/?]*)(.*)", re.S)
+ESCAPE = re.compile(r"%([0-9a-fA-F]{2})")
+UNRESERVED = re.compile(r"[A-Za-z0-9._~-]")
+MAX_RESOLVED_URLS = 4096
+
+
+def remove_dot_segments(path):
+    output = []
+    segments = path.split("/")
+    for segment in segments:
+        if segment == "..":
+            if len(output) > 1:
+                output.pop()
+        elif segment != ".":
+            output.append(segment)
+    # A trailing dot segment still names a directory
+    if segments[-1] in [".", ".."]:
+        output.append("")
+    return "/".join(output)
+
+
+def normalize_escapes(text):
+    if "%" not in text:
+        return text
+
+    def normalize(match):
+        char = chr(int(match.group(1), 16))
+        return char if UNRESERVED.fullmatch(char) else match.group(0).upper()
+
+    return ESCAPE.sub(normalize, text)
 
 
 class URL:
+    # URLs are shared through the resolve cache, so they must not be changed
+    # after parsing
+    __slots__ = [
+        "error",
+        "scheme",
+        "media_type",
+        "data",
+        "host",
+        "port",
+        "path",
+        "normalized",
+    ]
+
     def __init__(self, url):
         self.error = None
+        self.normalized = None
         if ":" not in url:
             url = "about:blank"
 
         self.scheme, url = url.split(":", 1)
+        self.scheme = self.scheme.lower()
 
         if self.scheme not in ["http", "https", "file", "data", "about"]:
             self.scheme = "about"
             return
 
         if self.scheme == "data":
-            try:
-                self.media_type, self.data = url.split(",")  # noqa: vulture
-            except ValueError:
+            # Only the first comma ends the media type; the payload may have more
+            self.media_type, comma, self.data = url.partition(",")
+            if not comma:
                 self.error = errors.invalid_url
             return
 
         if self.scheme == "about":
             return
 
+        url = url.split("#", 1)[0]
         try:
             _, url = url.split("//", 1)
         except ValueError:
             self.error = errors.invalid_url
             return
 
-        if self.scheme == "http":
-            self.port = 80
-
-        if self.scheme == "https":
-            self.port = 443
+        if self.scheme in DEFAULT_PORTS:
+            self.port = DEFAULT_PORTS[self.scheme]
 
-        if "/" not in url:
-            url += "/"
-
-        self.host, url = url.split("/", 1)
-        self.path = "/" + url
+        authority, url = AUTHORITY.match(url).groups()
+        path, query, url = url.partition("?")
+        path = remove_dot_segments(path or "/")
+        self.path = normalize_escapes(path) + query + normalize_escapes(url)
 
+        self.host = authority.rpartition("@")[2].lower()
         if ":" in self.host:
             self.host, port = self.host.split(":", 1)
-            self.port = int(port)
+            try:
+                self.port = int(port) if port else self.port
+            except ValueError:
+                self.error = errors.invalid_url
+
+    def __str__(self):
+        if self.normalized is None:
+            self.normalized = self.serialize()
+        return self.normalized
+
+    def __eq__(self, other):
+        if not isinstance(other, URL):
+            return NotImplemented
+        return str(self) == str(other)
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def serialize(self):
+        if self.error:
+            return "about:blank"
+        if self.scheme in ["http", "https"]:
+            port = "" if self.port == DEFAULT_PORTS[self.scheme] else f":{self.port}"
+            return f"{self.scheme}://{self.host}{port}{self.path}"
+        if self.scheme == "file":
+            return "file://" + self.path
+        if self.scheme == "data":
+            return "data:{},{}".format(self.media_type, self.data)
+        return "about:blank"
+
+    def resolve(self, url):
+        return resolve_reference(str(self), url)
+
+    # With receive, a body too large to keep in memory only goes to receive,
+    # and the content returned for it is None
+    def request(self, receive=None):
+        stream = TextStream(receive) if receive else None
+        content = self.follow(stream)
+        # Cached and non-network content arrives all at once
+        if stream and not stream.started:
+            receive(content)
+        return content
 
-    def request(self):
+    def follow(self, stream=None):
         if self.error:
             return self.error
         if self.scheme == "file":
-            return read_file(self.path)
+            return read_file(self.path, stream)
 
         if self.scheme == "data":
-            return self.data
+            return read_data_url(self.media_type, self.data)
 
         if self.scheme == "about":
-            return []
-
-        s = socket.socket(
-            family=socket.AF_INET, type=socket.SOCK_STREAM, proto=socket.IPPROTO_TCP
+            return ""
+
+        url = self
+        for _ in range(MAX_REDIRECTS + 1):
+            target = permanent_redirects.get(str(url))
+            if target is None:
+                try:
+                    entry = url.load(stream)
+                except ResponseTooLarge:
+                    # Whatever was already shown stays, with the error after it
+                    if stream and stream.started:
+                        stream.send(errors.response_too_large)
+                    return errors.response_too_large
+                target = redirect_target(url, entry.status, entry.headers)
+                if target is None:
+                    return entry.content
+            if target.error or target.scheme not in ["http", "https"]:
+                return errors.invalid_redirect
+            url = target
+        return errors.too_many_redirects
+
+    def load(self, stream=None):
+        if archive.mode:
+            # Recording has to see every response and replay has to serve
+            # every one, so neither goes through the cache
+            return CacheEntry(*self.fetch({}, stream))
+
+        key = str(self)
+        entry = lookup(key)
+        if entry and entry.is_fresh():
+            return entry
+
+        status, response_headers, content = self.fetch(
+            entry.validators() if entry else {}, stream
         )
+        return store(key, entry, status, response_headers, content)
+
+    def fetch(self, headers=None, stream=None):
+        headers = {} if headers is None else headers
+        if archive.mode == "replay":
+            with timings.record(self) as timing:
+                s = archive.open(self)
+                status, response_headers, content, _ = self.exchange(
+                    s, headers, stream, timing
+                )
+                return status, response_headers, content
+
+        key = (self.scheme, self.host, self.port)
+        connection = h2_connections.get(key)
+        if connection:
+            try:
+                with timings.record(self) as timing:
+                    timing.reused = True
+                    return self.exchange_h2(connection, headers, stream, timing)
+            except ConnectionError:
+                # Like an idle HTTP/1.1 connection, a shared HTTP/2 one may
+                # have gone away under us; fall through to a fresh connection
+                if stream and stream.started:
+                    raise
 
-        s.connect((self.host, self.port))
-
-        if self.scheme == "https":
-            ctx = ssl.create_default_context()
-            s = ctx.wrap_socket(s, server_hostname=self.host)
-
-        request = "GET {} HTTP/1.0\r\n".format(self.path)
-        request += "Host: {}\r\n".format(self.host)
-        request += stringify_headers()
-        request += "\r\n"
-        s.send(request.encode("utf8"))
-
-        response = s.makefile("r", encoding="utf8", newline="\r\n")
-        statusline = response.readline()
-        _, _, _ = statusline.split(" ", 2)  # version status explanation
-
-        response_headers = {}
         while True:
-            line = response.readline()
-            if line == "\r\n":
-                break
-            header, value = line.split(":", 1)
-            response_headers[header.casefold()] = value.strip()
-
-        assert "transfer-encoding" not in response_headers
-        assert "content-encoding" not in response_headers
-
-        content = response.read()
-        s.close()
-
-        return content
+            with timings.record(self) as timing:
+                s, reused = pool.acquire(key, timing)
+                keep_alive = False
+                try:
+                    if not reused and h2_connections.speaks_h2(key, s):
+                        connection = h2_connections.add(key, s)
+                        s = None
+                        return self.exchange_h2(connection, headers, stream, timing)
+                    status, response_headers, content, keep_alive = self.exchange(
+                        s, headers, stream, timing
+                    )
+                    return status, response_headers, content
+                except OSError as e:
+                    # The server may have dropped an idle connection just as we
+                    # picked it up, so retry on a fresh one. Once part of the
+                    # body has been handed on there is no taking it back
+                    if not reused or (stream and stream.started):
+                        raise
+                    timing.error = str(e) or type(e).__name__
+                finally:
+                    # HTTP/2 connections are shared, so they leave the pool of
+                    # exclusive HTTP/1.1 connections once negotiated
+                    pool.release(key, s, keep_alive)
+
+    def exchange_h2(self, connection, headers, stream, timing):
+        fields = h2_request_headers(self, request_headers(headers))
+        h2_stream = connection.open_stream(fields)
+        timing.http_version = "HTTP/2"
+        timing.request_headers = dict(fields)
+        timing.request_bytes = h2_stream.sent_bytes
+        timing.lap("send")
+
+        status, response_headers, body = connection.wait(h2_stream)
+        timing.lap("wait", h2_stream.first_byte)
+        timing.status, timing.response_headers = status, response_headers
+        timing.header_bytes = h2_stream.header_bytes
+
+        content = self.decode_response(status, response_headers, body, stream)
+        timing.lap("receive")
+        timing.body_bytes = h2_stream.body_bytes
+        return status, response_headers, content
+
+    def encode_request(self, headers=None):
+        return b"".join(
+            [
+                b"GET ",
+                self.path.encode("utf8"),
+                b" HTTP/1.1\r\nHost: ",
+                self.host.encode("utf8"),
+                b"\r\n",
+                encode_headers(headers),
+                b"\r\n",
+            ]
+        )
 
+    def exchange(self, s, headers, stream, timing):
+        request = self.encode_request(headers)
+        s.sendall(request)
+        self.sent(request, headers, timing)
 
-@dataclass
-class Element:
-    tag: str
-    attributes: Dict
-    parent: Element | None
-    children: list["Element"] = field(default_factory=list)
+        response = ResponseReader(s)
+        status, response_headers, content, persistent = self.read_response(
+            response, stream, timing
+        )
+        # Anything left over means the connection is out of step with us
+        keep_alive = persistent and not response.pending()
+
+        return status, response_headers, content, keep_alive
+
+    def sent(self, request, headers, timing):
+        timing.request_headers = {"Host": self.host, **request_headers(headers)}
+        timing.request_bytes = len(request)
+        timing.lap("send")
+
+    def read_response(self, response, stream, timing):
+        start = response.consumed()
+        version, status, response_headers = response.read_head()
+        timing.lap("wait")
+        timing.http_version, timing.status = version, status
+        timing.response_headers = response_headers
+        timing.header_bytes = response.consumed() - start
+
+        connection = response_headers.get("connection", "").casefold()
+        persistent = connection != "close" and (
+            version == "HTTP/1.1" or connection == "keep-alive"
+        )
+        transfer_encoding = response_headers.get("transfer-encoding", "").casefold()
+        if not has_body(status):
+            body = []
+        elif transfer_encoding.rsplit(",", 1)[-1].strip() == "chunked":
+            body = read_chunked(response)
+        elif "content-length" in response_headers:
+            body = response.stream(int(response_headers["content-length"]))
+        else:
+            body = response.stream()
+            persistent = False
+
+        content = self.decode_response(status, response_headers, body, stream)
+        timing.lap("receive")
+        timing.body_bytes = response.consumed() - start - timing.header_bytes
+        return status, response_headers, content, persistent
+
+    def decode_response(self, status, response_headers, body, stream=None):
+        body = archive.capture(self, status, response_headers, body)
+        body = decode_content(body, response_headers.get("content-encoding", ""))
+        streamed = (
+            stream is not None
+            and has_body(status)
+            and not is_redirect(status, response_headers)
+        )
+        if streamed:
+            body = stream.decode(body, response_headers)
+        return read_body(response_headers, body, streamed)
+
+
+# Pages repeat the same links many times over, so resolving the same
+# reference against the same page reuses the URL parsed the first time
+@functools.lru_cache(maxsize=MAX_RESOLVED_URLS)
+def resolve_reference(base, reference):
+    reference = reference.strip().split("#", 1)[0]
+    if SCHEME.match(reference):
+        return URL(reference)
+    base = URL(base)
+    if base.scheme not in ["http", "https", "file"]:
+        return URL(reference)
+    if reference.startswith("//"):
+        return URL(base.scheme + ":" + reference)
+
+    path = base.path.split("?", 1)[0]
+    if not reference:
+        reference = base.path
+    elif reference.startswith("?"):
+        reference = path + reference
+    elif not reference.startswith("/"):
+        reference = path[: path.rfind("/") + 1] + reference
+    if base.scheme == "file":
+        return URL("file://" + reference)
+    return URL("{}://{}:{}{}".format(base.scheme, base.host, base.port, reference))
+
+
+class Node:
+    __slots__ = ("parent_ref",)
+    # Text never has children; sharing one empty tuple keeps tree walks uniform
+    children = ()
+
+    def __init__(self, parent):
+        # Nodes point back at their parent weakly, so a tree nobody uses any
+        # more is freed by reference counting instead of the cycle collector
+        self.parent_ref = weakref.ref(parent) if parent else None
+
+    @property
+    def parent(self):
+        return self.parent_ref() if self.parent_ref else None
+
+
+class Element(Node):
+    __slots__ = ("tag", "attributes", "children", "__weakref__")
+
+    def __init__(self, tag, attributes, parent):
+        super().__init__(parent)
+        self.tag = tag
+        self.attributes = attributes
+        self.children = ()
+
+    def append(self, child):
+        # Leaves keep the shared empty tuple, and a list made for the first
+        # child is allocated at exactly that size
+        if self.children:
+            self.children.append(child)
+        else:
+            self.children = [child]
 
     def __repr__(self) -> str:
         return "<" + self.tag + ">"
 
 
-@dataclass
-class Text:
-    text: str
-    parent: Element
-    children: list["Element"] = field(default_factory=list)
+class Text(Node):
+    __slots__ = ("text",)
+
+    def __init__(self, text, parent):
+        super().__init__(parent)
+        self.text = text
 
     def __repr__(self) -> str:
         return repr(self.text)
@@ -144,6 +445,8 @@ HSTEP, VSTEP = 13, 18
 BULLET_GUTTER = VSTEP * 1.5
 BULLET_SIZE = 3
 SCROLL_STEP = 100
+POLL_INTERVAL = 16
+PROGRESSIVE_LAYOUT_INTERVAL = 0.25
 BLOCK_ELEMENTS = [
     "html",
     "body",
@@ -183,6 +486,69 @@ BLOCK_ELEMENTS = [
     "details",
     "summary",
 ]
+HEADINGS = ["h1", "h2", "h3", "h4", "h5", "h6"]
+# Start tags that end an open paragraph
+CLOSES_P = set(HEADINGS) | {
+    "address",
+    "article",
+    "aside",
+    "blockquote",
+    "center",
+    "dd",
+    "details",
+    "dialog",
+    "dir",
+    "div",
+    "dl",
+    "dt",
+    "fieldset",
+    "figcaption",
+    "figure",
+    "footer",
+    "form",
+    "header",
+    "hgroup",
+    "hr",
+    "li",
+    "listing",
+    "main",
+    "menu",
+    "nav",
+    "ol",
+    "p",
+    "plaintext",
+    "pre",
+    "section",
+    "summary",
+    "table",
+    "ul",
+    "xmp",
+}
+# End tags these elements may leave out are implied by the ones around them
+IMPLIED_END_TAGS = ["dd", "dt", "li", "optgroup", "option", "p", "rb", "rp", "rt"]
+DEFAULT_SCOPE = [
+    "applet",
+    "caption",
+    "html",
+    "marquee",
+    "object",
+    "table",
+    "td",
+    "template",
+    "th",
+]
+SCOPE_BOUNDARIES = {
+    "default": DEFAULT_SCOPE,
+    "list item": DEFAULT_SCOPE + ["ol", "ul"],
+    "button": DEFAULT_SCOPE + ["button"],
+    "table": ["html", "table", "template"],
+}
+SCOPE_KINDS = {}
+for kind, boundaries in SCOPE_BOUNDARIES.items():
+    for boundary in boundaries:
+        SCOPE_KINDS.setdefault(boundary, []).append(kind)
+TABLE_PARTS = ["caption", "table", "tbody", "td", "tfoot", "th", "thead", "tr"]
+
 HEAD_TAGS = [
     "base",
     "basefont",
@@ -410,9 +776,16 @@ class DocumentLayout:
 
 
 class HTMLParser:
-    def __init__(self, body):
+    def __init__(self, body=""):
         self.body = body
         self.unfinished = []
+        self.tokenizer = HTMLTokenizer()
+        self.mode = "initial"
+        # Where each open tag sits in self.unfinished, and where the elements
+        # that bound each kind of scope sit, kept up to date on every push and
+        # pop so scope checks never walk the stack
+        self.positions = {}
+        self.scope_boundaries = {kind: [] for kind in SCOPE_BOUNDARIES}
         self.SELF_CLOSING_TAGS = [
             "area",
             "base",
@@ -430,132 +803,190 @@ class HTMLParser:
             "wbr",
         ]
 
-    def implicit_tags(self, tag):
-        while True:
-            open_tags = [node.tag for node in self.unfinished]
-            if open_tags == [] and tag != "html":
-                self.add_tag("html")
-            elif open_tags == ["html"] and tag not in ["head", "body", "/html"]:
-                if tag in HEAD_TAGS:
-                    self.add_tag("head")
-                else:
-                    self.add_tag("body")
-            elif open_tags == ["html", "head"] and tag not in ["/head"] + HEAD_TAGS:
-                self.add_tag("/head")
-            else:
-                break
+    def push(self, node):
+        index = len(self.unfinished)
+        self.unfinished.append(node)
+        self.positions.setdefault(node.tag, []).append(index)
+        for kind in SCOPE_KINDS.get(node.tag, []):
+            self.scope_boundaries[kind].append(index)
+
+    def pop(self):
+        node = self.unfinished.pop()
+        self.positions[node.tag].pop()
+        for kind in SCOPE_KINDS.get(node.tag, []):
+            self.scope_boundaries[kind].pop()
+        return node
+
+    def current(self):
+        return self.unfinished[-1].tag if self.unfinished else None
+
+    def in_scope(self, tag, kind="default"):
+        positions = self.positions.get(tag)
+        if not positions:
+            return False
+        boundaries = self.scope_boundaries[kind]
+        return positions[-1] >= (boundaries[-1] if boundaries else 0)
+
+    def close_element(self, tag):
+        while self.current() in IMPLIED_END_TAGS and self.current() != tag:
+            self.pop()
+        while self.pop().tag != tag:
+            pass
+
+    def insert(self, tag, attributes=None):
+        # Open elements join the tree straight away so a partially parsed
+        # document can already be laid out
+        parent = self.unfinished[-1] if self.unfinished else None
+        node = Element(tag, {} if attributes is None else attributes, parent)
+        if parent:
+            parent.append(node)
+        if tag not in self.SELF_CLOSING_TAGS:
+            self.push(node)
+        return node
+
+    def before_content(self, tag):
+        # Creates whatever html, head and body elements the document left
+        # out, up to where the tag belongs
+        if self.mode == "initial":
+            self.insert("html")
+            self.mode = "before head"
+        if self.mode == "before head" and tag in HEAD_TAGS:
+            self.insert("head")
+            self.mode = "in head"
+        if self.mode == "in head" and tag not in HEAD_TAGS:
+            while self.pop().tag != "head":
+                pass
+            self.mode = "after head"
+        if self.mode == "after head" or (
+            self.mode == "before head" and tag not in HEAD_TAGS
+        ):
+            self.insert("body")
+            self.mode = "in body"
+        if self.mode == "after body":
+            self.mode = "in body"
 
     def add_text(self, text):
         if text.isspace():
             return
-        self.implicit_tags(None)
+        # Text inside <title> and friends stays in the head
+        if self.mode != "in head" or self.current() == "head":
+            self.before_content(None)
         parent = self.unfinished[-1]
         node = Text(text, parent)
-        parent.children.append(node)
+        parent.append(node)
 
-    def add_tag(self, tag):
-        tag, attributes = self.get_attributes(tag)
-        if tag.startswith("!"):
+    def start_tag(self, tag, attributes):
+        if tag == "html":
+            if self.mode == "initial":
+                self.insert("html", attributes)
+                self.mode = "before head"
+            else:
+                self.merge_attributes(0, attributes)
+            return
+        if self.mode == "initial":
+            self.insert("html")
+            self.mode = "before head"
+        if tag == "head":
+            if self.mode == "before head":
+                self.insert("head", attributes)
+                self.mode = "in head"
             return
-        self.implicit_tags(tag)
-        if tag.startswith("/"):
-            if len(self.unfinished) == 1:
+        if tag == "body":
+            if self.mode in ["in body", "after body"]:
+                self.merge_attributes(1, attributes)
+                self.mode = "in body"
                 return
-            node = self.unfinished.pop()
-            parent = self.unfinished[-1]
-            parent.children.append(node)
-        elif tag in self.SELF_CLOSING_TAGS:
-            parent = self.unfinished[-1]
-            node = Element(tag, attributes, parent)
-            parent.children.append(node)
+            if self.mode == "in head":
+                while self.pop().tag != "head":
+                    pass
+            self.insert("body", attributes)
+            self.mode = "in body"
+            return
 
-        else:
-            parent = self.unfinished[-1] if self.unfinished else None
-            node = Element(tag, attributes, parent)
-            self.unfinished.append(node)
-
-    def get_attributes(self, text):
-        parts = text.split()
-        tag = parts[0].casefold()
-        attributes = {}
-        for attrpair in parts[1:]:
-            if "=" in attrpair:
-                key, value = attrpair.split("=", 1)
-                if len(value) > 2 and value[0] in ["'", '"']:
-                    value = value[1:-1]
-                attributes[key.casefold()] = value
-            else:
-                attributes[attrpair.casefold()] = ""
+        self.before_content(tag)
+        if self.mode == "in head":
+            self.insert(tag, attributes)
+            return
 
-        return tag, attributes
+        if tag in CLOSES_P and self.in_scope("p", "button"):
+            self.close_element("p")
+        if tag in HEADINGS and self.current() in HEADINGS:
+            self.pop()
+        elif tag == "li" and self.in_scope("li", "list item"):
+            self.close_element("li")
+        elif tag in ["dd", "dt"]:
+            for other in ["dd", "dt"]:
+                if self.in_scope(other):
+                    self.close_element(other)
+        elif tag == "button" and self.in_scope("button"):
+            self.close_element("button")
+        self.insert(tag, attributes)
+
+    def end_tag(self, tag):
+        if self.mode == "in head":
+            if tag == "head":
+                self.pop()
+                self.mode = "after head"
+            elif tag == self.current():
+                self.pop()
+            return
+        if self.mode != "in body":
+            return
+
+        if tag in ["body", "html"]:
+            # Anything after </body> still goes in the body, so it stays open
+            self.mode = "after body"
+        elif tag == "p" and not self.in_scope("p", "button"):
+            # A stray </p> makes an empty paragraph, as in other browsers
+            self.insert("p")
+            self.close_element("p")
+        elif tag in HEADINGS:
+            for heading in HEADINGS:
+                if self.in_scope(heading):
+                    self.close_element(heading)
+                    break
+        elif tag == "li":
+            if self.in_scope("li", "list item"):
+                self.close_element("li")
+        elif self.in_scope(tag, "table" if tag in TABLE_PARTS else "default"):
+            self.close_element(tag)
+
+    def merge_attributes(self, index, attributes):
+        if len(self.unfinished) > index:
+            node = self.unfinished[index]
+            node.attributes = {**attributes, **node.attributes}
+
+    def handle(self, token):
+        if isinstance(token, StartTag):
+            self.start_tag(token.tag, token.attributes)
+        elif isinstance(token, EndTag):
+            self.end_tag(token.tag)
+        elif isinstance(token, Characters):
+            self.add_text(token.text)
 
     def finish(self):
         if not self.unfinished:
-            self.implicit_tags(None)
-        while len(self.unfinished) > 1:
-            node = self.unfinished.pop()
-            parent = self.unfinished[-1]
-            parent.children.append(node)
-        return self.unfinished.pop()
-
-    def parse(self):
-        text = ""
-        in_tag = False
-        in_comment = False
-        i = 0
-        while i < len(self.body):
-            c = self.body[i]
-            if in_comment:
-                if self.body.startswith("-->", i):
-                    in_comment = False
-                    i += 3
-                    continue
-                i += 1
-                continue
-            if not in_comment and not in_tag and self.body.startswith("<!--", i):
-                if text:
-                    self.add_text(text)
-                    text = ""
-                in_comment = True
-                i += 4
-                continue
-            if c == "<":
-                in_tag = True
-                if text:
-                    self.add_text(text)
-                text = ""
-            elif c == ">":
-                in_tag = False
-                self.add_tag(text)
-                text = ""
-            elif not in_tag and c == "&":
-                # Character reference parser
-                matches = []
-                for key in entities:
-                    if self.body.startswith(key, i):
-                        matches.append(key)
-                longest_match = max(matches, key=len, default=None)
-                if longest_match:
-                    char_ref = entities.get(longest_match)
-                    assert char_ref is not None
-                    characters = char_ref.get("characters")
-                    assert isinstance(characters, str)
-                    text += characters
-                    i += len(longest_match)
-                    continue
-                else:
-                    text += c
-
-            else:
-                text += c
+            self.before_content(None)
+        root = self.unfinished[0]
+        self.unfinished = []
+        return root
 
-            i += 1
+    def root(self):
+        return self.unfinished[0] if self.unfinished else None
 
-        if not in_tag and text:
-            self.add_text(text)
+    def feed(self, data):
+        for token in self.tokenizer.feed(data):
+            self.handle(token)
 
+    def close(self):
+        for token in self.tokenizer.close():
+            self.handle(token)
         return self.finish()
 
+    def parse(self):  # noqa: vulture
+        self.feed(self.body)
+        return self.close()
+
 
 def print_tree(node, indent=0):
     print(" " * indent, node)
@@ -604,7 +1035,7 @@ class DrawRect:
 
 
 class Browser:
-    def __init__(self):
+    def __init__(self, prefetch=False):
         self.width = WIDTH
         self.height = HEIGHT
 
@@ -612,6 +1043,10 @@ class Browser:
         self.canvas = tkinter.Canvas(self.window)
         self.canvas.pack(fill=tkinter.BOTH, expand=True)
         self.scroll = 0
+        self.nodes = None
+        self.document = None
+        self.display_list = []
+        self.prefetcher = Prefetcher() if prefetch else None
 
         self.window.bind("<Up>", self.scrollup)
         self.window.bind("<Down>", self.scrolldown)
@@ -620,16 +1055,54 @@ class Browser:
         self.canvas.bind("<Configure>", self.configure)
 
     def max_scroll_y(self):
+        if self.document is None:
+            return 0
         assert self.document.height is not None
         return max(self.document.height + 2 * VSTEP - self.height, 0)
 
     def load(self, url):
-        body = url.request()
-        self.nodes = HTMLParser(body).parse()
-        # print_tree(self.nodes)
-        self.relayout()
+        # The download runs on a worker thread; parsing and layout stay on the
+        # Tk thread, which picks up text as it arrives
+        if self.prefetcher:
+            self.prefetcher.cancel()
+        self.url = url
+        self.parser = HTMLParser()
+        self.received = queue.Queue()
+        self.last_layout = 0
+        threading.Thread(target=self.download, args=(url,), daemon=True).start()
+        self.poll()
+
+    def download(self, url):
+        try:
+            url.request(self.received.put)
+        finally:
+            self.received.put(None)
+
+    def poll(self):
+        while True:
+            try:
+                text = self.received.get_nowait()
+            except queue.Empty:
+                break
+            if text is None:
+                self.nodes = self.parser.close()
+                # print_tree(self.nodes)
+                self.relayout()
+                if self.prefetcher:
+                    self.prefetcher.start(self.nodes, self.url)
+                return
+            self.parser.feed(text)
+
+        now = time.monotonic()
+        if self.parser.root() and now - self.last_layout > PROGRESSIVE_LAYOUT_INTERVAL:
+            self.nodes = self.parser.root()
+            self.relayout()
+            self.last_layout = time.monotonic()
+        self.window.after(POLL_INTERVAL, self.poll)
 
     def relayout(self):
+        if self.nodes is None:
+            return
         self.document = DocumentLayout(self.nodes, self.width)
         self.document.layout()
         # print_tree(self.document)
@@ -670,8 +1143,39 @@ class Browser:
 
 
 if __name__ == "__main__":
-    import sys
-
-    url = sys.argv[1] if len(sys.argv) > 1 else "about:blank"
-    Browser().load(URL(url))
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m src.browser")
+    parser.add_argument("url", nargs="?", default="about:blank")
+    parser.add_argument(
+        "--prefetch", action="store_true", help="fetch linked pages in the background"
+    )
+    parser.add_argument(
+        "--har", metavar="PATH", help="write network timings to a HAR file on exit"
+    )
+    parser.add_argument(
+        "--record", metavar="PATH", help="save every response to an archive on exit"
+    )
+    parser.add_argument(
+        "--replay", metavar="PATH", help="serve responses from an archive instead"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0, help="added replay latency in ms"
+    )
+    parser.add_argument(
+        "--bandwidth", type=float, help="replay bandwidth in KiB per second"
+    )
+    args = parser.parse_args()
+
+    if args.record:
+        archive.record(args.record)
+    elif args.replay:
+        bandwidth = args.bandwidth * 1024 if args.bandwidth else None
+        archive.replay(args.replay, args.latency / 1000, bandwidth)
+
+    Browser(prefetch=args.prefetch).load(URL(args.url))
     tkinter.mainloop()
+    if args.har:
+        timings.write_har(args.har)
+    if args.record:
+        archive.save()
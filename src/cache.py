@@ -0,0 +1,143 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+
+CACHE_BYTES = 32 * 1024 * 1024
+CACHEABLE_STATUSES = [200, 203, 404, 410]
+
+
+def parse_cache_control(value):
+    directives = {}
+    for directive in value.split(","):
+        key, _, argument = directive.partition("=")
+        key = key.strip().casefold()
+        if key:
+            directives[key] = argument.strip().strip('"')
+    return directives
+
+
+def parse_date(value):
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+def freshness_lifetime(headers):
+    cache_control = parse_cache_control(headers.get("cache-control", ""))
+    if "no-cache" in cache_control:
+        return 0
+    if "max-age" in cache_control:
+        try:
+            return max(int(cache_control["max-age"]), 0)
+        except ValueError:
+            return 0
+    if "expires" in headers:
+        expires = parse_date(headers["expires"])
+        if expires is None:
+            return 0
+        date = parse_date(headers.get("date", "")) or time.time()
+        return max(expires - date, 0)
+    return None
+
+
+def is_storable(status, headers):
+    cache_control = parse_cache_control(headers.get("cache-control", ""))
+    return (
+        status in CACHEABLE_STATUSES
+        and "no-store" not in cache_control
+        and (
+            freshness_lifetime(headers) is not None
+            or "etag" in headers
+            or "last-modified" in headers
+        )
+    )
+
+
+def expiry(headers):
+    try:
+        age = int(headers.get("age", 0))
+    except ValueError:
+        age = 0
+    return time.time() + (freshness_lifetime(headers) or 0) - age
+
+
+class CacheEntry:
+    def __init__(self, status, headers, content, expires=None):
+        self.status = status
+        self.headers = headers
+        self.content = content
+        self.size = sys.getsizeof(content)
+        self.expires = expiry(headers) if expires is None else expires
+
+    def is_fresh(self):
+        return time.time() < self.expires
+
+    def is_storable(self):
+        return is_storable(self.status, self.headers)
+
+    def validators(self):
+        headers = {}
+        if "etag" in self.headers:
+            headers["If-None-Match"] = self.headers["etag"]
+        if "last-modified" in self.headers:
+            headers["If-Modified-Since"] = self.headers["last-modified"]
+        return headers
+
+    def revalidate(self, headers):
+        # A 304 carries updated metadata but describes the body we already have
+        headers = {
+            key: value
+            for key, value in headers.items()
+            if key not in ["content-length", "transfer-encoding", "content-encoding"]
+        }
+        return CacheEntry(self.status, {**self.headers, **headers}, self.content)
+
+
+class ResponseCache:
+    def __init__(self, max_bytes=CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0  # noqa: vulture
+        self.misses = 0  # noqa: vulture
+        self.evictions = 0  # noqa: vulture
+        self.lock = threading.Lock()
+
+    # Stale entries are returned too so the caller can revalidate them
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or not entry.is_fresh():
+                self.misses += 1  # noqa: vulture
+            else:
+                self.entries.move_to_end(key)
+                self.hits += 1  # noqa: vulture
+            return entry
+
+    def put(self, key, entry):
+        if not entry.is_storable() or entry.size > self.max_bytes:
+            return
+        with self.lock:
+            self.remove(key)
+            self.entries[key] = entry
+            self.size += entry.size
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= evicted.size
+                self.evictions += 1  # noqa: vulture
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry.size
+
+
+cache = ResponseCache()
@@ -0,0 +1,17 @@
+def read_chunked(response):
+    while True:
+        line = response.readline()
+        if not line:
+            raise ConnectionResetError("Connection closed inside chunked body")
+        size = int(line.split(b";", 1)[0].strip(), 16)
+        if size == 0:
+            break
+        chunk = response.read(size)
+        if len(chunk) < size:
+            raise ConnectionResetError("Connection closed inside chunk")
+        yield chunk
+        response.readline()
+
+    # Trailer fields are allowed after the last chunk; we have no use for them
+    while response.readline() not in [b"\r\n", b"\n", b""]:
+        pass
@@ -0,0 +1,39 @@
+import zlib
+
+
+def decompressor(coding):
+    if coding in ["gzip", "x-gzip"]:
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if coding == "deflate":
+        # Let zlib detect the header. Servers that send raw deflate without
+        # one are handled when the first chunk arrives
+        return zlib.decompressobj(32 + zlib.MAX_WBITS)
+    raise ValueError("Unsupported Content-Encoding: {}".format(coding))
+
+
+def decompress(chunks, coding):
+    d = decompressor(coding)
+    first = True
+    for chunk in chunks:
+        try:
+            data = d.decompress(chunk)
+        except zlib.error:
+            if coding != "deflate" or not first:
+                raise
+            d = zlib.decompressobj(-zlib.MAX_WBITS)
+            data = d.decompress(chunk)
+        first = first and not chunk
+        if data:
+            yield data
+    data = d.flush()
+    if data:
+        yield data
+
+
+def decode_content(chunks, content_encoding):
+    # Codings are listed in the order they were applied, so undo them in reverse
+    codings = [c.strip().casefold() for c in content_encoding.split(",")]
+    for coding in reversed(codings):
+        if coding not in ["", "identity"]:
+            chunks = decompress(chunks, coding)
+    return chunks
@@ -0,0 +1,89 @@
+import select
+import threading
+import time
+
+from .resolver import connect, resolver
+from .tls import tls
+
+IDLE_TIMEOUT = 30
+MAX_CONNECTIONS_PER_HOST = 6
+
+
+def open_connection(scheme, host, port, timing):
+    addresses = resolver.resolve(host, port)
+    timing.lap("dns")
+    try:
+        s = connect(addresses)
+    except OSError:
+        # The cached addresses may be the reason we could not connect
+        resolver.forget(host, port)
+        raise
+    timing.lap("connect")
+
+    if scheme == "https":
+        s = tls.wrap(s, host, port)
+        timing.lap("ssl")
+
+    return s
+
+
+def is_alive(s):
+    # An idle connection should have nothing to read. If it is readable the
+    # server either closed it or sent something we did not ask for.
+    try:
+        readable, _, _ = select.select([s], [], [], 0)
+    except (OSError, ValueError):
+        return False
+    return not readable
+
+
+class ConnectionPool:
+    def __init__(
+        self, idle_timeout=IDLE_TIMEOUT, max_per_host=MAX_CONNECTIONS_PER_HOST
+    ):
+        self.idle_timeout = idle_timeout
+        self.max_per_host = max_per_host
+        self.idle = {}
+        self.in_use = {}
+        self.hits = 0  # noqa: vulture
+        self.misses = 0  # noqa: vulture
+        self.lock = threading.Condition()
+
+    def acquire(self, key, timing):
+        with self.lock:
+            while self.in_use.get(key, 0) >= self.max_per_host:
+                self.lock.wait()
+            self.in_use[key] = self.in_use.get(key, 0) + 1
+            timing.lap("blocked")
+
+            idle = self.idle.get(key, [])
+            now = time.monotonic()
+            while idle:
+                s, released_at = idle.pop()
+                if now - released_at < self.idle_timeout and is_alive(s):
+                    self.hits += 1  # noqa: vulture
+                    timing.reused = True
+                    return s, True
+                s.close()
+            self.misses += 1  # noqa: vulture
+
+        try:
+            return open_connection(*key, timing), False
+        except BaseException:
+            self.release(key, None)
+            raise
+
+    def release(self, key, s, reusable=False):
+        with self.lock:
+            self.in_use[key] -= 1
+            if s is not None:
+                _, host, port = key
+                tls.save_session(s, host, port)
+                if reusable:
+                    self.idle.setdefault(key, []).append((s, time.monotonic()))
+                else:
+                    s.close()
+            self.lock.notify_all()
+
+
+pool = ConnectionPool()
@@ -1,3 +1,19 @@
 invalid_url = """<h1>Invalid URL</h1>
 <p>The given URL could not be parsed</p>
 """
+
+too_many_redirects = """<h1>Too many redirects</h1>
+<p>The page kept redirecting and was not loaded</p>
+"""
+
+invalid_redirect = """<h1>Invalid redirect</h1>
+<p>The page redirected to a location that cannot be loaded</p>
+"""
+
+response_too_large = """<h1>Response too large</h1>
+<p>The rest of the page was not loaded because it is over the size limit</p>
+"""
+
+not_archived = """<h1>Not in archive</h1>
+<p>The page was not recorded in the archive being replayed</p>
+"""
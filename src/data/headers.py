@@ -1,10 +1,23 @@
-headers = {"Connection": "close", "User-Agent": "Webskater"}
+headers = {
+    "Connection": "keep-alive",
+    "Accept-Encoding": "gzip, deflate",
+    "User-Agent": "Webskater",
+}
 
 
-def stringify_headers():
-    headers_string = ""
+def request_headers(overrides=None):
+    return {**headers, **(overrides or {})}
 
-    for key, value in headers.items():
-        headers_string += f"{key}: {value}\r\n"
 
-    return headers_string
+def encode_fields(fields):
+    return b"".join(f"{key}: {value}\r\n".encode("latin-1") for key, value in fields)
+
+
+# Most requests only send the defaults, so those are encoded once up front
+encoded_headers = encode_fields(headers.items())
+
+
+def encode_headers(overrides=None):
+    if not overrides:
+        return encoded_headers
+    return encode_fields(request_headers(overrides).items())
@@ -0,0 +1,27 @@
+import binascii
+from urllib.parse import unquote_to_bytes
+
+from .data import errors
+from .response import decode_body
+
+
+def read_data_url(media_type, data):
+    params = media_type.split(";")
+    base64 = params[-1].strip().casefold() == "base64"
+    if base64:
+        params.pop()
+    # RFC 2397 defaults to US-ASCII, which decoding as UTF-8 already covers
+    if not params[0].strip():
+        params[0] = "text/plain"
+
+    # Text with nothing escaped is already decoded, whatever its charset
+    if not base64 and "%" not in data:
+        return data
+
+    body = unquote_to_bytes(data) if "%" in data else data.encode("utf8")
+    if base64:
+        try:
+            body = binascii.a2b_base64(memoryview(body))
+        except binascii.Error:
+            return errors.invalid_url
+    return decode_body({"content-type": ";".join(params)}, body)
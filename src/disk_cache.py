@@ -0,0 +1,183 @@
+import contextlib
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+import time
+
+from .cache import CacheEntry, cache
+
+try:
+    import fcntl
+except ImportError:  # Windows has no flock, so fall back to unlocked access
+    fcntl = None
+
+DISK_CACHE_BYTES = 256 * 1024 * 1024
+
+
+def default_cache_dir():
+    root = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(root, "webskater")
+
+
+def read_body(path):
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return ""
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as body:
+            return str(body, "utf8")
+
+
+def write_atomic(directory, path, data):
+    # Readers either see the old file or the new one, never a partial write
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class DiskCache:
+    def __init__(self, directory=None, max_bytes=DISK_CACHE_BYTES):
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(self.directory, "index.json")
+        self.lock_path = os.path.join(self.directory, "index.lock")
+        self.index = {}
+        self.index_version = None
+
+    @contextlib.contextmanager
+    def locked(self, exclusive):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.lock_path, "a") as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def load_index(self):
+        try:
+            version = self.stat_index()
+        except FileNotFoundError:
+            self.index, self.index_version = {}, None
+            return
+        if version == self.index_version:
+            return
+        try:
+            with open(self.index_path) as file:
+                self.index = json.load(file)
+        except ValueError:
+            self.index = {}
+            self.remove_orphans()
+        self.index_version = version
+
+    def save_index(self):
+        data = json.dumps(self.index).encode("utf8")
+        write_atomic(self.directory, self.index_path, data)
+        self.index_version = self.stat_index()
+
+    def stat_index(self):
+        # Another process replaces the index file rather than editing it, so a
+        # changed inode or mtime means our copy is out of date
+        stat = os.stat(self.index_path)
+        return stat.st_ino, stat.st_mtime_ns
+
+    def body_path(self, key):
+        return os.path.join(self.directory, hashlib.sha256(key.encode()).hexdigest())
+
+    def get(self, key):
+        if not os.path.exists(self.index_path):
+            return None
+        with self.locked(exclusive=False):
+            self.load_index()
+            record = self.index.get(key)
+            if record is None:
+                return None
+            try:
+                content = read_body(self.body_path(key))
+            except (OSError, ValueError):
+                return None
+        return CacheEntry(
+            record["status"], record["headers"], content, record["expires"]
+        )
+
+    def put(self, key, entry):
+        if not entry.is_storable():
+            return
+        body = entry.content.encode("utf8")
+        if len(body) > self.max_bytes:
+            return
+        with self.locked(exclusive=True):
+            write_atomic(self.directory, self.body_path(key), body)
+            self.load_index()
+            self.index[key] = self.record(entry, len(body))
+            self.evict()
+            self.save_index()
+
+    def refresh(self, key, entry):
+        with self.locked(exclusive=True):
+            self.load_index()
+            if key in self.index and os.path.exists(self.body_path(key)):
+                self.index[key] = self.record(entry, self.index[key]["size"])
+                self.save_index()
+                return
+        self.put(key, entry)
+
+    def remove_orphans(self):
+        indexed = {os.path.basename(self.body_path(key)) for key in self.index}
+        for name in os.listdir(self.directory):
+            if name in indexed or name in ["index.json", "index.lock"]:
+                continue
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(os.path.join(self.directory, name))
+
+    def record(self, entry, size):
+        return {
+            "status": entry.status,
+            "headers": entry.headers,
+            "expires": entry.expires,
+            "size": size,
+            "stored": time.time(),
+        }
+
+    def evict(self):
+        size = sum(record["size"] for record in self.index.values())
+        for key in sorted(self.index, key=lambda key: self.index[key]["stored"]):
+            if size <= self.max_bytes:
+                break
+            size -= self.index.pop(key)["size"]
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self.body_path(key))
+
+
+disk_cache = DiskCache()
+
+
+def lookup(key):
+    entry = cache.get(key)
+    if entry is None:
+        entry = disk_cache.get(key)
+        if entry and entry.is_fresh():
+            cache.put(key, entry)
+    return entry
+
+
+def store(key, entry, status, headers, content):
+    if status == 304 and entry:
+        entry = entry.revalidate(headers)
+        disk_cache.refresh(key, entry)
+    elif content is None:
+        # The body went straight to its consumer and was not kept
+        return CacheEntry(status, headers, content)
+    else:
+        entry = CacheEntry(status, headers, content)
+        disk_cache.put(key, entry)
+    cache.put(key, entry)
+    return entry
@@ -0,0 +1,70 @@
+import re
+
+from .data.c1_replacements import c1_replacements
+from .data.entities import entities
+
+NUMERIC_REFERENCE = re.compile(r"#(?:[xX]([0-9a-fA-F]+)|([0-9]+));?")
+# Everything a numeric reference could still grow from
+NUMERIC_PREFIX = re.compile(r"#(?:[xX][0-9a-fA-F]*|[0-9]*)")
+REPLACEMENT_CHARACTER = "�"
+# Longer runs are past U+10FFFF, and int() refuses very long decimal strings
+MAX_HEX_DIGITS = 6
+MAX_DECIMAL_DIGITS = 7
+
+
+def build_trie(entities):
+    root = {}
+    for name, entity in entities.items():
+        node = root
+        for c in name[1:]:
+            node = node.setdefault(c, {})
+        # No character is empty, so "" marks where a name ends
+        node[""] = entity["characters"]
+    return root
+
+
+entity_trie = build_trie(entities)
+
+
+# Decodes the character reference starting at the "&" at text[i]. Returns the
+# characters and where the reference ends, or None if the text ends before we
+# can tell
+def decode_reference(text, i, final=True):
+    if text.startswith("#", i + 1):
+        return decode_numeric(text, i, final)
+
+    node = entity_trie
+    match = None
+    j = i + 1
+    while j < len(text):
+        node = node.get(text[j])
+        if node is None:
+            break
+        j += 1
+        if "" in node:
+            match = (node[""], j)
+    else:
+        if not final:
+            return None
+    return match or ("&", i + 1)
+
+
+def decode_numeric(text, i, final):
+    if not final and NUMERIC_PREFIX.match(text, i + 1).end() == len(text):
+        return None
+    match = NUMERIC_REFERENCE.match(text, i + 1)
+    if match is None:
+        return "&", i + 1
+
+    hex_digits, digits = match.groups()
+    if hex_digits:
+        digits, base, limit = hex_digits, 16, MAX_HEX_DIGITS
+    else:
+        base, limit = 10, MAX_DECIMAL_DIGITS
+    digits = digits.lstrip("0") or "0"
+    if len(digits) > limit:
+        return REPLACEMENT_CHARACTER, match.end()
+    code = int(digits, base)
+    if code == 0 or code > 0x10FFFF or 0xD800 <= code <= 0xDFFF:
+        return REPLACEMENT_CHARACTER, match.end()
+    return chr(c1_replacements.get(code, code)), match.end()
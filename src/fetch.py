@@ -0,0 +1,161 @@
+import asyncio
+import tempfile
+
+from .chunked import read_chunked
+from .compression import decode_content
+from .connection import MAX_CONNECTIONS_PER_HOST
+from .data import errors
+from .disk_cache import lookup, store
+from .redirects import MAX_REDIRECTS, permanent_redirects, redirect_target
+from .resolver import CONNECT_STAGGER
+from .response import (
+    BUFFER_SIZE,
+    body_limits,
+    has_body,
+    parse_head,
+    read_body,
+)
+from .timing import timings
+from .tls import tls
+
+MAX_CONCURRENT_FETCHES = 32
+
+
+class Fetcher:
+    def __init__(
+        self, max_per_host=MAX_CONNECTIONS_PER_HOST, max_total=MAX_CONCURRENT_FETCHES
+    ):
+        self.max_per_host = max_per_host
+        self.total = asyncio.Semaphore(max_total)
+        self.hosts = {}
+
+    def host_limit(self, url):
+        key = (url.scheme, url.host, url.port)
+        if key not in self.hosts:
+            self.hosts[key] = asyncio.Semaphore(self.max_per_host)
+        return self.hosts[key]
+
+    async def fetch(self, url):
+        if url.error or url.scheme not in ["http", "https"]:
+            return url.request()
+
+        for _ in range(MAX_REDIRECTS + 1):
+            target = permanent_redirects.get(str(url))
+            if target is None:
+                entry = await self.load(url)
+                target = redirect_target(url, entry.status, entry.headers)
+                if target is None:
+                    return entry.content
+            if target.error or target.scheme not in ["http", "https"]:
+                return errors.invalid_redirect
+            url = target
+        return errors.too_many_redirects
+
+    async def load(self, url):
+        key = str(url)
+        entry = lookup(key)
+        if entry and entry.is_fresh():
+            return entry
+
+        async with self.total, self.host_limit(url):
+            status, response_headers, content = await self.exchange(
+                url, entry.validators() if entry else {}
+            )
+        return store(key, entry, status, response_headers, content)
+
+    async def exchange(self, url, headers=None):
+        headers = {} if headers is None else headers
+        with timings.record(url) as timing:
+            return await self.timed_exchange(url, headers, timing)
+
+    async def timed_exchange(self, url, headers, timing):
+        ctx = tls.get_context(("http/1.1",)) if url.scheme == "https" else None
+
+        reader, writer = await asyncio.open_connection(
+            url.host,
+            url.port,
+            ssl=ctx,
+            server_hostname=url.host if ctx else None,
+            happy_eyeballs_delay=CONNECT_STAGGER,
+            interleave=1,
+        )
+        # asyncio resolves, connects and shakes hands in one step, so all of
+        # it counts as connecting
+        timing.lap("connect")
+        with tempfile.SpooledTemporaryFile(max_size=body_limits.memory) as rest:
+            try:
+                headers = {**headers, "Connection": "close"}
+                request = url.encode_request(headers)
+                writer.write(request)
+                await writer.drain()
+                url.sent(request, headers, timing)
+
+                head = await reader.readuntil(b"\r\n\r\n")
+                timing.lap("wait")
+                version, status, response_headers = parse_head(head[:-4])
+                size = await read_limited(reader, rest)
+            finally:
+                writer.close()
+            timing.http_version, timing.status = version, status
+            timing.response_headers = response_headers
+            timing.header_bytes, timing.body_bytes = len(head), size
+
+            rest.seek(0)
+            transfer_encoding = response_headers.get("transfer-encoding", "").casefold()
+            if not has_body(status):
+                body = []
+            elif transfer_encoding.rsplit(",", 1)[-1].strip() == "chunked":
+                body = read_chunked(rest)
+            elif "content-length" in response_headers:
+                length = int(response_headers["content-length"])
+                if size < length:
+                    raise asyncio.IncompleteReadError(rest.read(), length)
+                body = read_chunks(rest, length)
+            else:
+                body = read_chunks(rest)
+
+            body = decode_content(body, response_headers.get("content-encoding", ""))
+            content = read_body(response_headers, body)
+        timing.lap("receive")
+        return status, response_headers, content
+
+
+# The body is spooled as it arrives, so only the part past the memory limit
+# has to wait on disk
+async def read_limited(reader, file):
+    size = 0
+    while chunk := await reader.read(BUFFER_SIZE):
+        size += len(chunk)
+        body_limits.check(size)
+        file.write(chunk)
+    return size
+
+
+def read_chunks(file, size=None):
+    while size is None or size > 0:
+        chunk = file.read(BUFFER_SIZE if size is None else min(size, BUFFER_SIZE))
+        if not chunk:
+            return
+        if size is not None:
+            size -= len(chunk)
+        yield chunk
+
+
+async def fetch_all(urls, **limits):
+    fetcher = Fetcher(**limits)
+
+    async def fetch(url):
+        try:
+            return url, await fetcher.fetch(url)
+        except Exception as e:
+            return url, e
+
+    for result in asyncio.as_completed([fetch(url) for url in urls]):
+        yield await result
+
+
+def fetch_many(urls, **limits):  # noqa: vulture
+    async def collect():
+        return [result async for result in fetch_all(urls, **limits)]
+
+    return asyncio.run(collect())
@@ -1,3 +1,84 @@
-def read_file(path):
-    with open(path, "r") as file:
-        return file.read()
+import codecs
+import mmap
+import os
+import threading
+from collections import OrderedDict
+
+from .response import sniff_charset
+
+FILE_CHUNK_SIZE = 1024 * 1024
+FILE_CACHE_CHARS = 128 * 1024 * 1024
+# Bigger files only go to the stream, when there is one, and are never held
+STREAM_ONLY_BYTES = 8 * 1024 * 1024
+
+
+class FileCache:
+    def __init__(self, max_chars=FILE_CACHE_CHARS):
+        self.max_chars = max_chars
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def get(self, path, version):
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is None or entry[0] != version:
+                return None
+            self.entries.move_to_end(path)
+            return entry[1]
+
+    def put(self, path, version, content):
+        if len(content) > self.max_chars:
+            return
+        with self.lock:
+            if path in self.entries:
+                self.size -= len(self.entries.pop(path)[1])
+            self.entries[path] = (version, content)
+            self.size += len(content)
+            while self.size > self.max_chars:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+
+file_cache = FileCache()
+
+
+def read_file(path, stream=None):
+    with open(path, "rb") as file:
+        stat = os.fstat(file.fileno())
+        # An edited file gets a new mtime or size, so it is read again
+        version = (stat.st_mtime_ns, stat.st_size)
+        content = file_cache.get(path, version)
+        if content is not None:
+            return content
+        if stat.st_size == 0:
+            return ""
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            content = decode_mapped(mapped, stream)
+    if content is not None:
+        file_cache.put(path, version, content)
+    return content
+
+
+# The file's bytes stay in the page cache rather than on our heap. A big
+# file with a stream to go to is decoded a chunk at a time and handed on
+# before the next chunk is touched, and None stands in for its text
+def decode_mapped(mapped, stream=None):
+    charset = sniff_charset({}, mapped)
+    if stream is None or len(mapped) <= STREAM_ONLY_BYTES:
+        # Decoding straight from the mapping leaves no copy of the bytes
+        content = str(mapped, charset, "replace")
+        if stream:
+            stream.send(content)
+        return content
+
+    decoder = codecs.getincrementaldecoder(charset)(errors="replace")
+    for start in range(0, len(mapped), FILE_CHUNK_SIZE):
+        stream.send(decoder.decode(mapped[start : start + FILE_CHUNK_SIZE]))
+    stream.send(decoder.decode(b"", final=True))
+    return None
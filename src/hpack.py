@@ -0,0 +1,214 @@
+from .data.hpack import huffman_codes, static_table
+
+DEFAULT_TABLE_SIZE = 4096
+ENTRY_OVERHEAD = 32
+
+huffman_symbols = {
+    (length, code): symbol for symbol, (code, length) in enumerate(huffman_codes)
+}
+EOS = 256
+
+
+class HPACKError(ValueError):
+    pass
+
+
+def encode_integer(value, prefix_bits, flags=0):
+    limit = (1 << prefix_bits) - 1
+    if value < limit:
+        return bytes([flags | value])
+    out = bytearray([flags | limit])
+    value -= limit
+    while value >= 128:
+        out.append((value & 127) | 128)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def decode_integer(data, pos, prefix_bits):
+    limit = (1 << prefix_bits) - 1
+    if pos >= len(data):
+        raise HPACKError("Truncated integer")
+    value = data[pos] & limit
+    pos += 1
+    if value < limit:
+        return value, pos
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise HPACKError("Truncated integer")
+        byte = data[pos]
+        pos += 1
+        value += (byte & 127) << shift
+        shift += 7
+        if not byte & 128:
+            return value, pos
+
+
+def huffman_encode(data):
+    bits = 0
+    count = 0
+    out = bytearray()
+    for byte in data:
+        code, length = huffman_codes[byte]
+        bits = (bits << length) | code
+        count += length
+        while count >= 8:
+            count -= 8
+            out.append((bits >> count) & 255)
+        bits &= (1 << count) - 1
+    if count:
+        # Pad with the most significant bits of EOS, which are all ones
+        out.append(((bits << (8 - count)) | ((1 << (8 - count)) - 1)) & 255)
+    return bytes(out)
+
+
+def huffman_decode(data):
+    out = bytearray()
+    code = 0
+    length = 0
+    for byte in data:
+        for shift in range(7, -1, -1):
+            code = (code << 1) | ((byte >> shift) & 1)
+            length += 1
+            symbol = huffman_symbols.get((length, code))
+            if symbol is not None:
+                if symbol == EOS:
+                    raise HPACKError("EOS in Huffman string")
+                out.append(symbol)
+                code = length = 0
+            elif length > 30:
+                raise HPACKError("Invalid Huffman code")
+    if length > 7 or code != (1 << length) - 1:
+        raise HPACKError("Invalid Huffman padding")
+    return bytes(out)
+
+
+def encode_string(value):
+    raw = value.encode("latin-1")
+    huffman = huffman_encode(raw)
+    if len(huffman) < len(raw):
+        return encode_integer(len(huffman), 7, 128) + huffman
+    return encode_integer(len(raw), 7) + raw
+
+
+def decode_string(data, pos):
+    if pos >= len(data):
+        raise HPACKError("Truncated string")
+    huffman = data[pos] & 128
+    length, pos = decode_integer(data, pos, 7)
+    if pos + length > len(data):
+        raise HPACKError("Truncated string")
+    raw = bytes(data[pos : pos + length])
+    if huffman:
+        raw = huffman_decode(raw)
+    return raw.decode("latin-1"), pos + length
+
+
+class HeaderTable:
+    def __init__(self, max_size=DEFAULT_TABLE_SIZE):
+        self.max_size = max_size
+        self.entries = []
+        self.size = 0
+
+    def get(self, index):
+        if 1 <= index <= len(static_table):
+            return static_table[index - 1]
+        index -= len(static_table) + 1
+        if 0 <= index < len(self.entries):
+            return self.entries[index]
+        raise HPACKError("Header index {} out of range".format(index))
+
+    def add(self, name, value):
+        self.entries.insert(0, (name, value))
+        self.size += len(name) + len(value) + ENTRY_OVERHEAD
+        self.shrink()
+
+    def resize(self, max_size):
+        self.max_size = max_size
+        self.shrink()
+
+    def shrink(self):
+        while self.size > self.max_size:
+            name, value = self.entries.pop()
+            self.size -= len(name) + len(value) + ENTRY_OVERHEAD
+
+
+class Decoder:
+    def __init__(self, max_table_size=DEFAULT_TABLE_SIZE):
+        self.max_table_size = max_table_size
+        self.table = HeaderTable(max_table_size)
+
+    def decode(self, data):
+        headers = []
+        pos = 0
+        while pos < len(data):
+            byte = data[pos]
+            if byte & 128:
+                index, pos = decode_integer(data, pos, 7)
+                headers.append(self.table.get(index))
+            elif byte & 64:
+                name, value, pos = self.literal(data, pos, 6)
+                self.table.add(name, value)
+                headers.append((name, value))
+            elif byte & 32:
+                size, pos = decode_integer(data, pos, 5)
+                if size > self.max_table_size:
+                    raise HPACKError("Table size update over the limit")
+                self.table.resize(size)
+            else:
+                # Literal without indexing or never indexed
+                name, value, pos = self.literal(data, pos, 4)
+                headers.append((name, value))
+        return headers
+
+    def literal(self, data, pos, prefix_bits):
+        index, pos = decode_integer(data, pos, prefix_bits)
+        if index:
+            name = self.table.get(index)[0]
+        else:
+            name, pos = decode_string(data, pos)
+        value, pos = decode_string(data, pos)
+        return name, value, pos
+
+
+class Encoder:
+    def __init__(self):
+        self.table = HeaderTable()
+        self.pending_resize = None
+
+    def resize(self, max_size):
+        # The peer learns about the new size at the start of the next block
+        max_size = min(max_size, DEFAULT_TABLE_SIZE)
+        if max_size != self.table.max_size:
+            self.table.resize(max_size)
+            self.pending_resize = max_size
+
+    def encode(self, headers):
+        out = bytearray()
+        if self.pending_resize is not None:
+            out += encode_integer(self.pending_resize, 5, 32)
+            self.pending_resize = None
+        for name, value in headers:
+            index, exact = self.find(name, value)
+            if exact:
+                out += encode_integer(index, 7, 128)
+                continue
+            if index:
+                out += encode_integer(index, 6, 64)
+            else:
+                out += encode_integer(0, 6, 64) + encode_string(name)
+            out += encode_string(value)
+            self.table.add(name, value)
+        return bytes(out)
+
+    def find(self, name, value):
+        name_index = 0
+        entries = static_table + self.table.entries
+        for i, (entry_name, entry_value) in enumerate(entries, 1):
+            if entry_name == name:
+                if entry_value == value:
+                    return i, True
+                name_index = name_index or i
+        return name_index, False
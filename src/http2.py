@@ -0,0 +1,408 @@
+import select
+import ssl
+import struct
+import threading
+import time
+from collections import deque
+
+from .hpack import Decoder, Encoder
+from .response import ResponseReader
+
+PREFACE = b"PRI * HTTP/2.0\r\n\r\nSM\r\n\r\n"
+
+DATA = 0x0
+HEADERS = 0x1
+RST_STREAM = 0x3
+SETTINGS = 0x4
+PUSH_PROMISE = 0x5
+PING = 0x6
+GOAWAY = 0x7
+WINDOW_UPDATE = 0x8
+CONTINUATION = 0x9
+
+END_STREAM = 0x1
+ACK = 0x1
+END_HEADERS = 0x4
+PADDED = 0x8
+PRIORITY = 0x20
+
+CANCEL = 0x8
+
+SETTINGS_HEADER_TABLE_SIZE = 0x1
+SETTINGS_ENABLE_PUSH = 0x2
+SETTINGS_MAX_CONCURRENT_STREAMS = 0x3
+SETTINGS_INITIAL_WINDOW_SIZE = 0x4
+SETTINGS_MAX_FRAME_SIZE = 0x5
+
+DEFAULT_WINDOW = 65535
+RECEIVE_WINDOW = 1 << 24
+DEFAULT_MAX_FRAME_SIZE = 16384
+DEFAULT_MAX_STREAMS = 100
+MAX_STREAM_ID = (1 << 31) - 1
+POLL_INTERVAL = 0.05
+
+# Connection-specific headers are not allowed in HTTP/2 requests
+HOP_BY_HOP_HEADERS = [
+    "connection",
+    "keep-alive",
+    "transfer-encoding",
+    "upgrade",
+    "host",
+]
+
+
+class H2Error(ConnectionError):
+    pass
+
+
+def encode_frame(type, flags, stream_id, payload=b""):
+    return (
+        struct.pack(">I", len(payload))[1:]
+        + bytes([type, flags])
+        + struct.pack(">I", stream_id & MAX_STREAM_ID)
+        + payload
+    )
+
+
+def encode_settings(settings):
+    payload = b"".join(struct.pack(">HI", key, value) for key, value in settings)
+    return encode_frame(SETTINGS, 0, 0, payload)
+
+
+def encode_window_update(stream_id, increment):
+    return encode_frame(WINDOW_UPDATE, 0, stream_id, struct.pack(">I", increment))
+
+
+def read_frame(reader):
+    head = reader.read(9)
+    length = int.from_bytes(head[:3], "big")
+    type, flags = head[3], head[4]
+    stream_id = int.from_bytes(head[5:9], "big") & MAX_STREAM_ID
+    return type, flags, stream_id, reader.read(length)
+
+
+def strip_padding(flags, payload):
+    if flags & PADDED:
+        if not payload or payload[0] >= len(payload):
+            raise H2Error("Invalid padding")
+        payload = payload[1 : len(payload) - payload[0]]
+    return payload
+
+
+class Stream:
+    def __init__(self, id):
+        self.id = id
+        self.status = None
+        self.headers = {}
+        self.data = deque()
+        self.unacked = 0
+        self.done = False
+        self.error = None
+        self.sent_bytes = 0
+        self.header_bytes = 0
+        self.body_bytes = 0
+        self.first_byte = None
+
+
+class H2Connection:
+    def __init__(self, s):
+        self.s = s
+        self.reader = ResponseReader(s)
+        self.encoder = Encoder()
+        self.decoder = Decoder()
+        self.lock = threading.RLock()
+        self.streams = {}
+        self.next_stream_id = 1
+        self.max_streams = DEFAULT_MAX_STREAMS
+        self.max_frame_size = DEFAULT_MAX_FRAME_SIZE
+        self.unacked = 0
+        self.header_block = None
+        self.closed = False
+
+        s.sendall(
+            PREFACE
+            + encode_settings(
+                [
+                    (SETTINGS_ENABLE_PUSH, 0),
+                    (SETTINGS_INITIAL_WINDOW_SIZE, RECEIVE_WINDOW),
+                ]
+            )
+            + encode_window_update(0, RECEIVE_WINDOW - DEFAULT_WINDOW)
+        )
+
+    def request_many(self, requests):  # noqa: vulture
+        streams = [self.open_stream(headers) for headers in requests]
+        return [self.wait(stream) for stream in streams]
+
+    def open_stream(self, headers):
+        with self.lock:
+            while len(self.streams) >= self.max_streams and not self.closed:
+                self.step()
+            if self.closed or self.next_stream_id > MAX_STREAM_ID:
+                self.closed = True
+                self.close_if_idle()
+                raise H2Error("Connection is no longer accepting streams")
+            stream = Stream(self.next_stream_id)
+            self.next_stream_id += 2
+            self.streams[stream.id] = stream
+
+            block = self.encoder.encode(headers)
+            size = self.max_frame_size
+            fragments = [block[i : i + size] for i in range(0, len(block), size)]
+            frames = []
+            for i, fragment in enumerate(fragments or [b""]):
+                flags = END_HEADERS if i == len(fragments) - 1 else 0
+                if i == 0:
+                    frames.append(
+                        encode_frame(HEADERS, flags | END_STREAM, stream.id, fragment)
+                    )
+                else:
+                    frames.append(
+                        encode_frame(CONTINUATION, flags, stream.id, fragment)
+                    )
+            stream.sent_bytes = sum(len(frame) for frame in frames)
+            self.s.sendall(b"".join(frames))
+            return stream
+
+    # Returns once the response headers are in. The body is an iterator that
+    # reads frames as the caller asks for them
+    def wait(self, stream):
+        self.run_until(lambda: stream.status is not None or stream.done)
+        if stream.error:
+            raise stream.error
+        return stream.status, stream.headers, self.body(stream)
+
+    def body(self, stream):
+        try:
+            while True:
+                self.run_until(lambda: stream.data or stream.done)
+                with self.lock:
+                    if not stream.data:
+                        break
+                    chunk = stream.data.popleft()
+                    self.consumed(stream, len(chunk))
+                yield chunk
+            if stream.error:
+                raise stream.error
+        finally:
+            self.cancel(stream)
+
+    # Frames for any stream may arrive while we wait, so whichever thread
+    # holds the lock reads and dispatches them. Waiting for the socket happens
+    # outside the lock so other threads can keep opening streams
+    def run_until(self, ready):
+        while True:
+            with self.lock:
+                if ready():
+                    return
+                if self.frame_ready():
+                    self.step()
+                    continue
+            try:
+                select.select([self.s], [], [], POLL_INTERVAL)
+            except ValueError:
+                # Another thread closed the socket after finishing our stream
+                pass
+
+    # The stream window only opens again as the body is read, so a body
+    # nobody reads holds at most one window in memory
+    def consumed(self, stream, size):
+        stream.unacked += size
+        if stream.done or stream.unacked < RECEIVE_WINDOW // 2:
+            return
+        try:
+            self.s.sendall(encode_window_update(stream.id, stream.unacked))
+        except OSError as e:
+            self.fail(e)
+        stream.unacked = 0
+
+    def cancel(self, stream):
+        with self.lock:
+            if stream.done:
+                return
+            self.finish(stream)
+            try:
+                frame = encode_frame(
+                    RST_STREAM, 0, stream.id, struct.pack(">I", CANCEL)
+                )
+                self.s.sendall(frame)
+            except OSError as e:
+                self.fail(e)
+
+    def frame_ready(self):
+        if self.reader.pending():
+            return True
+        if isinstance(self.s, ssl.SSLSocket) and self.s.pending():
+            return True
+        readable, _, _ = select.select([self.s], [], [], 0)
+        return bool(readable)
+
+    def step(self):
+        try:
+            frame = read_frame(self.reader)
+            self.handle(*frame)
+        except (OSError, ValueError, struct.error) as e:
+            self.fail(e if isinstance(e, OSError) else H2Error(str(e)))
+
+    def fail(self, error, after=0):
+        if not after:
+            self.closed = True
+        for id, stream in list(self.streams.items()):
+            if id > after:
+                stream.error = error
+                self.finish(stream)
+        self.close_if_idle()
+
+    def finish(self, stream):
+        stream.done = True
+        self.streams.pop(stream.id, None)
+        self.close_if_idle()
+
+    # A closed connection keeps its socket until the streams it still owes
+    # us are done; bodies already received are read from memory
+    def close_if_idle(self):
+        if self.closed and not self.streams:
+            self.s.close()
+
+    def handle(self, type, flags, stream_id, payload):
+        if self.header_block and type != CONTINUATION:
+            raise H2Error("Expected CONTINUATION frame")
+        stream = self.streams.get(stream_id)
+        if stream and type in [HEADERS, CONTINUATION]:
+            stream.header_bytes += len(payload)
+
+        if type == DATA:
+            self.receive_data(stream, flags, payload)
+        elif type == HEADERS:
+            end_stream = flags & END_STREAM
+            payload = strip_padding(flags, payload)
+            if flags & PRIORITY:
+                payload = payload[5:]
+            self.header_block = (stream_id, end_stream, bytearray(payload))
+            if flags & END_HEADERS:
+                self.end_headers()
+        elif type == CONTINUATION:
+            if not self.header_block or self.header_block[0] != stream_id:
+                raise H2Error("Unexpected CONTINUATION frame")
+            self.header_block[2].extend(payload)
+            if flags & END_HEADERS:
+                self.end_headers()
+        elif type == RST_STREAM:
+            if stream:
+                (code,) = struct.unpack(">I", payload[:4])
+                stream.error = H2Error("Stream reset with error code {}".format(code))
+                self.finish(stream)
+        elif type == SETTINGS:
+            if not flags & ACK:
+                self.apply_settings(payload)
+                self.s.sendall(encode_frame(SETTINGS, ACK, 0))
+        elif type == PING:
+            if not flags & ACK:
+                self.s.sendall(encode_frame(PING, ACK, 0, payload))
+        elif type == GOAWAY:
+            (last_stream_id,) = struct.unpack(">I", payload[:4])
+            self.closed = True
+            # Streams the server never processed are safe to retry elsewhere
+            self.fail(
+                ConnectionResetError("Server sent GOAWAY"),
+                after=last_stream_id & MAX_STREAM_ID,
+            )
+        elif type == PUSH_PROMISE:
+            raise H2Error("Server push was disabled")
+
+    def receive_data(self, stream, flags, payload):
+        self.unacked += len(payload)
+        updates = []
+        if self.unacked >= RECEIVE_WINDOW // 2:
+            updates.append(encode_window_update(0, self.unacked))
+            self.unacked = 0
+        if stream:
+            data = strip_padding(flags, payload)
+            stream.data.append(data)
+            stream.body_bytes += len(payload)
+            # Padding counts against the window but is never read
+            stream.unacked += len(payload) - len(data)
+            if flags & END_STREAM:
+                self.finish(stream)
+        if updates:
+            self.s.sendall(b"".join(updates))
+
+    def end_headers(self):
+        stream_id, end_stream, block = self.header_block
+        self.header_block = None
+        # Every block has to be decoded to keep the HPACK table in step, even
+        # for streams we have already given up on
+        headers = self.decoder.decode(block)
+        stream = self.streams.get(stream_id)
+        if stream is None:
+            return
+        fields = {}
+        for name, value in headers:
+            if name in fields:
+                fields[name] += ", " + value
+            else:
+                fields[name] = value
+        status = fields.pop(":status", None)
+        if stream.status is None and status and not status.startswith("1"):
+            stream.status = int(status)
+            stream.headers = fields
+            stream.first_byte = time.perf_counter()
+        if end_stream:
+            self.finish(stream)
+
+    def apply_settings(self, payload):
+        for i in range(0, len(payload) - 5, 6):
+            key, value = struct.unpack(">HI", payload[i : i + 6])
+            if key == SETTINGS_HEADER_TABLE_SIZE:
+                self.encoder.resize(value)
+            elif key == SETTINGS_MAX_CONCURRENT_STREAMS:
+                self.max_streams = value
+            elif key == SETTINGS_MAX_FRAME_SIZE:
+                self.max_frame_size = value
+
+
+def request_headers(url, headers):
+    authority = url.host
+    if url.port != {"http": 80, "https": 443}[url.scheme]:
+        authority += ":{}".format(url.port)
+    fields = [
+        (":method", "GET"),
+        (":scheme", url.scheme),
+        (":authority", authority),
+        (":path", url.path),
+    ]
+    for name, value in headers.items():
+        if name.casefold() not in HOP_BY_HOP_HEADERS:
+            fields.append((name.casefold(), value))
+    return fields
+
+
+class H2Pool:
+    def __init__(self):
+        self.connections = {}
+        # Cleartext origins known to speak HTTP/2 without an upgrade (h2c)
+        self.prior_knowledge = set()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            connection = self.connections.get(key)
+            if connection and connection.closed:
+                del self.connections[key]
+                return None
+            return connection
+
+    def speaks_h2(self, key, s):
+        scheme, host, port = key
+        if isinstance(s, ssl.SSLSocket):
+            return s.selected_alpn_protocol() == "h2"
+        return (host, port) in self.prior_knowledge
+
+    def add(self, key, s):
+        connection = H2Connection(s)
+        with self.lock:
+            self.connections[key] = connection
+        return connection
+
+
+h2_connections = H2Pool()
@@ -0,0 +1,123 @@
+from .archive import archive
+from .connection import pool
+from .data import errors
+from .disk_cache import lookup, store
+from .http2 import h2_connections
+from .redirects import permanent_redirects, redirect_target
+from .response import ResponseReader
+from .timing import Timing, timings
+
+PIPELINE_DEPTH = 6
+
+
+# A URL that fails gets its exception as its result, as with fetch_all, so
+# one bad response does not cost the rest of the batch
+def request_pipelined(urls, depth=PIPELINE_DEPTH):  # noqa: vulture
+    if archive.mode:
+        return [request_or_error(url) for url in urls]
+
+    results = {}
+    batches = {}
+    for url in dict.fromkeys(urls):
+        if url.error or url.scheme not in ["http", "https"]:
+            results[url] = request_or_error(url)
+            continue
+        entry = lookup(str(url))
+        if (entry and entry.is_fresh()) or permanent_redirects.get(str(url)):
+            results[url] = request_or_error(url)
+            continue
+        batches.setdefault((url.scheme, url.host, url.port), []).append(url)
+
+    for key, pending in batches.items():
+        while pending:
+            answered = send_batch(key, pending[:depth], results)
+            if not answered:
+                # Not even the first response came back on a fresh connection,
+                # so leave it to the ordinary path, which reports any error
+                results[pending[0]] = request_or_error(pending[0])
+                answered = 1
+            pending = pending[answered:]
+
+    return [results[url] for url in urls]
+
+
+def send_batch(key, batch, results):
+    # Returns how many requests got their response. The rest have to be sent
+    # again on a fresh connection
+    if h2_connections.get(key):
+        return 0
+    timing = Timing(str(batch[0]))
+    try:
+        s, reused = pool.acquire(key, timing)
+    except OSError:
+        return 0
+
+    answered = 0
+    keep_alive = False
+    try:
+        if not reused and h2_connections.speaks_h2(key, s):
+            h2_connections.add(key, s)
+            s = None
+            return 0
+
+        entries = [lookup(str(url)) for url in batch]
+        headers = [entry.validators() if entry else {} for entry in entries]
+        requests = [url.encode_request(fields) for url, fields in zip(batch, headers)]
+        # Every request goes out back to back before any response is read
+        s.sendall(b"".join(requests))
+
+        response = ResponseReader(s)
+        for url, entry, request, fields in zip(batch, entries, requests, headers):
+            if answered:
+                timing = Timing(str(url))
+            timing.reused = reused or answered > 0
+            url.sent(request, fields, timing)
+            # Until this response has been read in full, the connection is
+            # not fit to go back to the pool
+            keep_alive = False
+            try:
+                status, response_headers, content, keep_alive = url.read_response(
+                    response, None, timing
+                )
+            except OSError as e:
+                timing.error = str(e) or type(e).__name__
+                raise
+            except Exception as e:
+                # A body that fails to decode leaves the connection out of
+                # step, so the responses after it are fetched again
+                timing.error = str(e) or type(e).__name__
+                results[url] = e
+                answered += 1
+                break
+            finally:
+                timings.add(timing)
+
+            entry = store(str(url), entry, status, response_headers, content)
+            results[url] = follow(url, entry)
+            answered += 1
+            if not keep_alive:
+                break
+        keep_alive = keep_alive and answered == len(batch) and not response.pending()
+    except OSError:
+        # The server closed the connection early; whatever it did not answer
+        # is retried by the caller
+        keep_alive = False
+    finally:
+        pool.release(key, s, keep_alive)
+    return answered
+
+
+def follow(url, entry):
+    target = redirect_target(url, entry.status, entry.headers)
+    if target is None:
+        return entry.content
+    if target.error or target.scheme not in ["http", "https"]:
+        return errors.invalid_redirect
+    return request_or_error(target)
+
+
+def request_or_error(url):
+    try:
+        return url.request()
+    except Exception as e:
+        return e
@@ -0,0 +1,81 @@
+import asyncio
+import threading
+
+from .fetch import Fetcher
+
+MAX_PREFETCHES = 8
+PREFETCH_BYTES = 2 * 1024 * 1024
+PREFETCH_CONCURRENCY = 2
+CANCEL_CHECK_INTERVAL = 0.05
+
+
+def prefetch_candidates(root, base_url, limit=MAX_PREFETCHES):
+    # Pages that ask for a prefetch know best, so those go ahead of links
+    hinted, links = [], []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        stack.extend(reversed(node.children))
+        tag = getattr(node, "tag", None)
+        href = getattr(node, "attributes", {}).get("href")
+        if not href or href.startswith("#"):
+            continue
+        if tag == "link" and "prefetch" in node.attributes.get("rel", "").split():
+            hinted.append(href)
+        elif tag == "a":
+            links.append(href)
+
+    candidates, seen = [], {str(base_url)}
+    for href in hinted + links:
+        url = base_url.resolve(href)
+        if url.error or url.scheme not in ["http", "https"] or str(url) in seen:
+            continue
+        seen.add(str(url))
+        candidates.append(url)
+        if len(candidates) == limit:
+            break
+    return candidates
+
+
+class Prefetcher:
+    def __init__(self, max_bytes=PREFETCH_BYTES, concurrency=PREFETCH_CONCURRENCY):
+        self.max_bytes = max_bytes
+        self.concurrency = concurrency
+        self.cancelled = None
+        self.thread = None
+
+    def start(self, root, base_url):
+        self.cancel()
+        urls = prefetch_candidates(root, base_url)
+        if not urls:
+            return
+        self.cancelled = threading.Event()
+        self.thread = threading.Thread(
+            target=asyncio.run, args=(self.run(urls, self.cancelled),), daemon=True
+        )
+        self.thread.start()
+
+    def cancel(self):
+        if self.cancelled:
+            self.cancelled.set()
+            self.thread.join()
+            self.cancelled = self.thread = None
+
+    async def run(self, urls, cancelled):
+        # One connection per host keeps prefetching from competing with the
+        # page the user actually asks for next
+        fetcher = Fetcher(max_per_host=1, max_total=self.concurrency)
+        pending = {asyncio.ensure_future(fetcher.fetch(url)) for url in urls}
+        fetched = 0
+        while pending and not cancelled.is_set() and fetched < self.max_bytes:
+            done, pending = await asyncio.wait(
+                pending,
+                timeout=CANCEL_CHECK_INTERVAL,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            for task in done:
+                if task.exception() is None:
+                    fetched += len(task.result())
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
@@ -0,0 +1,44 @@
+import threading
+from collections import OrderedDict
+
+MAX_REDIRECTS = 10
+MAX_PERMANENT_REDIRECTS = 1024
+REDIRECT_STATUSES = [301, 302, 303, 307, 308]
+PERMANENT_STATUSES = [301, 308]
+
+
+class RedirectCache:
+    def __init__(self, max_entries=MAX_PERMANENT_REDIRECTS):
+        self.max_entries = max_entries
+        self.targets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            target = self.targets.get(key)
+            if target is not None:
+                self.targets.move_to_end(key)
+            return target
+
+    def put(self, key, target):
+        with self.lock:
+            self.targets[key] = target
+            self.targets.move_to_end(key)
+            if len(self.targets) > self.max_entries:
+                self.targets.popitem(last=False)
+
+
+def is_redirect(status, headers):
+    return status in REDIRECT_STATUSES and "location" in headers
+
+
+def redirect_target(url, status, headers):
+    if not is_redirect(status, headers):
+        return None
+    target = url.resolve(headers["location"])
+    if status in PERMANENT_STATUSES:
+        permanent_redirects.put(str(url), target)
+    return target
+
+
+permanent_redirects = RedirectCache()
@@ -0,0 +1,107 @@
+import errno
+import os
+import selectors
+import socket
+import threading
+import time
+
+# getaddrinfo does not tell us the record TTL, so use a short fixed one
+DNS_TTL = 60
+CONNECT_STAGGER = 0.25
+CONNECT_TIMEOUT = 10
+
+
+class Resolver:
+    def __init__(self, ttl=DNS_TTL):
+        self.ttl = ttl
+        self.entries = {}
+        self.hits = 0  # noqa: vulture
+        self.misses = 0  # noqa: vulture
+        self.lock = threading.Lock()
+
+    def resolve(self, host, port):
+        key = (host.casefold(), port)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and time.monotonic() < entry[0]:
+                self.hits += 1  # noqa: vulture
+                return entry[1]
+            self.misses += 1  # noqa: vulture
+
+        addresses = socket.getaddrinfo(
+            host, port, socket.AF_UNSPEC, socket.SOCK_STREAM, socket.IPPROTO_TCP
+        )
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, addresses)
+        return addresses
+
+    def forget(self, host, port):
+        with self.lock:
+            self.entries.pop((host.casefold(), port), None)
+
+
+def interleave(addresses):
+    # Alternate address families, starting with whichever the resolver
+    # preferred, so one broken family cannot hold up the other (RFC 8305)
+    families = {}
+    for address in addresses:
+        families.setdefault(address[0], []).append(address)
+    queues = list(families.values())
+    ordered = []
+    while queues:
+        for queue in queues:
+            ordered.append(queue.pop(0))
+        queues = [queue for queue in queues if queue]
+    return ordered
+
+
+def connect(addresses, stagger=CONNECT_STAGGER, timeout=CONNECT_TIMEOUT):
+    pending = interleave(addresses)
+    attempts = {}
+    selector = selectors.DefaultSelector()
+    deadline = time.monotonic() + timeout
+    next_attempt = 0
+    error = None
+    try:
+        while pending or attempts:
+            now = time.monotonic()
+            if now >= deadline:
+                raise TimeoutError("Timed out connecting to any address")
+
+            if pending and (now >= next_attempt or not attempts):
+                family, type, proto, _, address = pending.pop(0)
+                s = socket.socket(family, type, proto)
+                s.setblocking(False)
+                err = s.connect_ex(address)
+                if err == 0:
+                    s.setblocking(True)
+                    return s
+                if err not in [errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EAGAIN]:
+                    s.close()
+                    error = OSError(err, os.strerror(err))
+                    continue
+                selector.register(s, selectors.EVENT_WRITE)
+                attempts[s] = address
+                next_attempt = now + stagger
+
+            wait = deadline if not pending else min(deadline, next_attempt)
+            for key, _ in selector.select(max(wait - now, 0)):
+                s = key.fileobj
+                selector.unregister(s)
+                del attempts[s]
+                err = s.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                if err == 0:
+                    s.setblocking(True)
+                    return s
+                s.close()
+                error = OSError(err, os.strerror(err))
+                # Don't wait out the stagger once an attempt has failed
+                next_attempt = 0
+        raise error or OSError("No addresses to connect to")
+    finally:
+        for s in attempts:
+            s.close()
+        selector.close()
+
+
+resolver = Resolver()
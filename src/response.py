@@ -0,0 +1,191 @@
+import codecs
+import re
+import tempfile
+
+BUFFER_SIZE = 64 * 1024
+PRESCAN_SIZE = 1024
+# Bodies bigger than this are spooled to a temporary file while downloading
+MEMORY_BODY_BYTES = 8 * 1024 * 1024
+MAX_BODY_BYTES = 256 * 1024 * 1024
+META_CHARSET = re.compile(rb"<meta[^>]+charset\s*=\s*[\"']?\s*([a-zA-Z0-9_.:-]+)", re.I)
+
+
+class ResponseReader:
+    def __init__(self, s, buffer_size=BUFFER_SIZE):
+        self.s = s
+        self.buffer = bytearray(buffer_size)
+        self.view = memoryview(self.buffer)
+        self.start = 0
+        self.end = 0
+        self.received = 0
+
+    def fill(self):
+        if self.start == self.end:
+            self.start = self.end = 0
+        elif self.end == len(self.buffer):
+            if self.start == 0:
+                # A single header block or line filled the whole buffer
+                self.view.release()
+                self.buffer.extend(bytes(len(self.buffer)))
+                self.view = memoryview(self.buffer)
+            else:
+                pending = self.end - self.start
+                self.view[:pending] = self.view[self.start : self.end]
+                self.start, self.end = 0, pending
+        received = self.s.recv_into(self.view[self.end :])
+        self.end += received
+        self.received += received
+        return received
+
+    def take(self, size):
+        data = bytes(self.view[self.start : self.start + size])
+        self.start += size
+        return data
+
+    def pending(self):
+        return self.end - self.start
+
+    def consumed(self):
+        return self.received - self.pending()
+
+    def read_head(self):
+        while True:
+            i = self.buffer.find(b"\r\n\r\n", self.start, self.end)
+            if i >= 0:
+                break
+            if not self.fill():
+                raise ConnectionResetError("Connection closed before response")
+        head = self.take(i - self.start)
+        self.start += 4
+        return parse_head(head)
+
+    def readline(self):
+        while True:
+            i = self.buffer.find(b"\n", self.start, self.end)
+            if i >= 0:
+                return self.take(i + 1 - self.start)
+            if not self.fill():
+                return self.take(self.pending())
+
+    def read(self, size):
+        return b"".join(self.stream(size))
+
+    def stream(self, size=None):
+        remaining = size
+        while remaining is None or remaining > 0:
+            if not self.pending() and not self.fill():
+                if remaining is not None:
+                    raise ConnectionResetError("Connection closed inside body")
+                return
+            available = self.pending()
+            if remaining is not None:
+                available = min(available, remaining)
+                remaining -= available
+            yield self.take(available)
+
+
+def has_body(status):
+    return not (100 <= status < 200 or status in [204, 304])
+
+
+def parse_head(head):
+    statusline, *lines = head.decode("iso-8859-1").split("\r\n")
+    version, status, _ = (statusline + " ").split(" ", 2)
+    headers = {}
+    for line in lines:
+        header, value = line.split(":", 1)
+        headers[header.casefold()] = value.strip()
+    return version, int(status), headers
+
+
+def sniff_charset(headers, body):
+    _, _, params = headers.get("content-type", "").partition(";")
+    for param in params.split(";"):
+        key, _, value = param.partition("=")
+        if key.strip().casefold() == "charset":
+            charset = value.strip().strip("\"'")
+            break
+    else:
+        match = META_CHARSET.search(body, 0, PRESCAN_SIZE)
+        charset = match.group(1).decode("ascii") if match else "utf-8"
+
+    try:
+        return codecs.lookup(charset).name
+    except LookupError:
+        return "utf-8"
+
+
+class TextStream:
+    def __init__(self, receive):
+        self.receive = receive
+        self.started = False
+
+    # Passes the body bytes through untouched while handing decoded text to
+    # receive. The charset is settled once enough bytes for a prescan are in
+    def decode(self, chunks, headers):
+        decoder = None
+        pending = b""
+        for chunk in chunks:
+            yield chunk
+            if decoder is None:
+                pending += chunk
+                if len(pending) < PRESCAN_SIZE:
+                    continue
+                decoder = self.decoder(headers, pending)
+                chunk, pending = pending, b""
+            self.send(decoder.decode(chunk))
+        if decoder is None:
+            decoder = self.decoder(headers, pending)
+        self.send(decoder.decode(pending, final=True))
+
+    def decoder(self, headers, body):
+        charset = sniff_charset(headers, body)
+        return codecs.getincrementaldecoder(charset)(errors="replace")
+
+    def send(self, text):
+        if text:
+            self.started = True
+            self.receive(text)
+
+
+class ResponseTooLarge(Exception):
+    pass
+
+
+class BodyLimits:
+    def __init__(self, memory=MEMORY_BODY_BYTES, maximum=MAX_BODY_BYTES):
+        self.memory = memory
+        self.maximum = maximum
+
+    def check(self, size):
+        if size > self.maximum:
+            raise ResponseTooLarge("Response body over {} bytes".format(self.maximum))
+
+
+body_limits = BodyLimits()
+
+
+def decode_body(headers, body):
+    return body.decode(sniff_charset(headers, body), errors="replace")
+
+
+def read_body(headers, chunks, streamed=False):
+    # The bytes of a large body wait on disk rather than in memory. When the
+    # text has already been streamed to a consumer, a large body is only
+    # counted, and None stands in for a second copy of it
+    size = 0
+    with tempfile.SpooledTemporaryFile(max_size=body_limits.memory) as body:
+        for chunk in chunks:
+            size += len(chunk)
+            body_limits.check(size)
+            if streamed and size > body_limits.memory:
+                body.close()
+            else:
+                body.write(chunk)
+        if body.closed:
+            return None
+
+        body.seek(0)
+        charset = sniff_charset(headers, body.read(PRESCAN_SIZE))
+        body.seek(0)
+        return body.read().decode(charset, errors="replace")
@@ -0,0 +1,136 @@
+import contextlib
+import datetime
+import json
+import threading
+import time
+from collections import deque
+
+from .data.headers import headers as default_headers
+
+MAX_TIMINGS = 1000
+PHASES = ["blocked", "dns", "connect", "ssl", "send", "wait", "receive"]
+
+
+class Timing:
+    def __init__(self, url=""):
+        self.url = url
+        self.started = time.time()
+        self.mark = time.perf_counter()
+        # Phases that did not happen, like DNS on a reused connection, stay None
+        self.blocked = None  # noqa: vulture
+        self.dns = None  # noqa: vulture
+        self.connect = None
+        self.ssl = None
+        self.send = None
+        self.wait = None
+        self.receive = None
+        self.reused = False
+        self.http_version = "HTTP/1.1"
+        self.request_headers = {}
+        self.request_bytes = 0
+        self.status = 0
+        self.response_headers = {}
+        self.header_bytes = -1
+        self.body_bytes = -1
+        self.error = None
+
+    def lap(self, phase, now=None):
+        now = time.perf_counter() if now is None else now
+        setattr(self, phase, now - self.mark)
+        self.mark = now
+
+    def total(self):
+        return sum(getattr(self, phase) or 0 for phase in PHASES)
+
+    def to_har(self):
+        def ms(seconds):
+            return -1 if seconds is None else round(seconds * 1000, 3)
+
+        def fields(headers):
+            return [{"name": name, "value": value} for name, value in headers.items()]
+
+        started = datetime.datetime.fromtimestamp(self.started, datetime.timezone.utc)
+        timings = {phase: ms(getattr(self, phase)) for phase in PHASES}
+        # HAR counts the TLS handshake as part of connecting
+        if self.ssl is not None:
+            timings["connect"] = ms((self.connect or 0) + self.ssl)
+        entry = {
+            "startedDateTime": started.isoformat(timespec="milliseconds"),
+            "time": ms(self.total()),
+            "request": {
+                "method": "GET",
+                "url": self.url,
+                "httpVersion": self.http_version,
+                "cookies": [],
+                "headers": fields(self.request_headers),
+                "queryString": [],
+                "headersSize": self.request_bytes,
+                "bodySize": 0,
+            },
+            "response": {
+                "status": self.status,
+                "statusText": "",
+                "httpVersion": self.http_version,
+                "cookies": [],
+                "headers": fields(self.response_headers),
+                "content": {
+                    "size": self.body_bytes,
+                    "mimeType": self.response_headers.get("content-type", ""),
+                },
+                "redirectURL": self.response_headers.get("location", ""),
+                "headersSize": self.header_bytes,
+                "bodySize": self.body_bytes,
+            },
+            "cache": {},
+            "timings": timings,
+            "connection": "reused" if self.reused else "new",
+        }
+        if self.error:
+            entry["_error"] = self.error
+        return entry
+
+
+class Timings:
+    def __init__(self, max_entries=MAX_TIMINGS):
+        self.entries = deque(maxlen=max_entries)
+        self.lock = threading.Lock()
+
+    def add(self, timing):
+        with self.lock:
+            self.entries.append(timing)
+
+    @contextlib.contextmanager
+    def record(self, url):
+        timing = Timing(str(url))
+        try:
+            yield timing
+        except Exception as e:
+            timing.error = str(e) or type(e).__name__
+            raise
+        finally:
+            self.add(timing)
+
+    def get(self, url=None):
+        with self.lock:
+            return [t for t in self.entries if url is None or t.url == str(url)]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def to_har(self):
+        return {
+            "log": {
+                "version": "1.2",
+                "creator": {"name": default_headers["User-Agent"], "version": ""},
+                "pages": [],
+                "entries": [timing.to_har() for timing in self.get()],
+            }
+        }
+
+    def write_har(self, path):
+        with open(path, "w") as file:
+            json.dump(self.to_har(), file, indent=2)
+
+
+timings = Timings()
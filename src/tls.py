@@ -0,0 +1,50 @@
+import ssl
+import threading
+import time
+
+HTTP2_PROTOCOLS = ("h2", "http/1.1")
+
+
+class TLS:
+    def __init__(self, cafile=None):
+        self.cafile = cafile
+        self.contexts = {}
+        self.sessions = {}
+        self.resumed = 0  # noqa: vulture
+        self.full = 0  # noqa: vulture
+        self.handshake_time = 0  # noqa: vulture
+        self.lock = threading.Lock()
+
+    def get_context(self, protocols=HTTP2_PROTOCOLS):
+        # Loading the CA store is slow, so connections share one context for
+        # each set of ALPN protocols
+        with self.lock:
+            if protocols not in self.contexts:
+                context = ssl.create_default_context(cafile=self.cafile)
+                context.set_alpn_protocols(list(protocols))
+                self.contexts[protocols] = context
+            return self.contexts[protocols]
+
+    def wrap(self, s, host, port):
+        context = self.get_context()
+        session = self.sessions.get((host, port))
+        start = time.perf_counter()
+        # If the server no longer accepts the session it does a full handshake
+        s = context.wrap_socket(s, server_hostname=host, session=session)
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            self.handshake_time += elapsed  # noqa: vulture
+            if s.session_reused:
+                self.resumed += 1  # noqa: vulture
+            else:
+                self.full += 1  # noqa: vulture
+        return s
+
+    def save_session(self, s, host, port):
+        # TLS 1.3 servers send session tickets after the handshake, so the
+        # session is only worth keeping once the connection has been used
+        if isinstance(s, ssl.SSLSocket) and s.session is not None:
+            self.sessions[(host, port)] = s.session
+
+
+tls = TLS()
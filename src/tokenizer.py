@@ -0,0 +1,181 @@
+import re
+import sys
+from dataclasses import dataclass
+from typing import Dict
+
+from .entities import decode_reference
+
+TEXT_SPECIAL = re.compile("[<>&]")
+TAG_SPECIAL = re.compile("[<>]")
+READ_SIZE = 64 * 1024
+
+
+@dataclass
+class StartTag:
+    tag: str
+    attributes: Dict
+
+
+@dataclass
+class EndTag:
+    tag: str
+
+
+@dataclass
+class Characters:
+    text: str
+
+
+@dataclass
+class Comment:
+    text: str
+
+
+def parse_tag(text):
+    parts = text.split()
+    if not parts:
+        return None
+    tag = parts[0].casefold()
+    if tag.startswith("!"):
+        # Doctypes and other markup declarations carry nothing we use
+        return None
+    if tag.startswith("/"):
+        return EndTag(sys.intern(tag[1:]))
+    # Names repeat throughout a document, so every node shares one copy
+    tag = sys.intern(tag)
+    attributes = {}
+    for attrpair in parts[1:]:
+        if "=" in attrpair:
+            key, value = attrpair.split("=", 1)
+            if len(value) > 2 and value[0] in ["'", '"']:
+                value = value[1:-1]
+            attributes[sys.intern(key.casefold())] = value
+        else:
+            attributes[sys.intern(attrpair.casefold())] = ""
+    return StartTag(tag, attributes)
+
+
+class HTMLTokenizer:
+    def __init__(self):
+        self.buffer = ""
+        self.text = ""
+        self.in_tag = False
+        self.in_comment = False
+
+    # Both consume their input before returning, so tokens are never lost
+    # to a caller that does not look at them
+    def feed(self, data):
+        self.buffer += data
+        return list(self.tokenize(final=False))
+
+    def close(self):
+        tokens = list(self.tokenize(final=True))
+        if self.in_comment:
+            tokens.append(Comment(self.text))
+        elif not self.in_tag and self.text:
+            tokens.append(Characters(self.text))
+        self.text = ""
+        return tokens
+
+    # Stops early when the next decision depends on input that has not
+    # arrived yet; the rest of the buffer waits for the next feed
+    def tokenize(self, final):
+        body = self.buffer
+        # Text runs are sliced out whole between the characters that matter
+        parts = [self.text]
+        i = 0
+        while i < len(body):
+            if self.in_comment:
+                end = body.find("-->", i)
+                if end < 0:
+                    # Keep back anything that could be the start of "-->"
+                    keep = len(body) if final else max(i, len(body) - 2)
+                    parts.append(body[i:keep])
+                    i = keep
+                    break
+                parts.append(body[i:end])
+                self.in_comment = False
+                i = end + 3
+                yield Comment("".join(parts))
+                parts = []
+                continue
+
+            match = (TAG_SPECIAL if self.in_tag else TEXT_SPECIAL).search(body, i)
+            if match is None:
+                parts.append(body[i:])
+                i = len(body)
+                break
+            if match.start() > i:
+                parts.append(body[i : match.start()])
+            i = match.start()
+            c = body[i]
+
+            if c == "&":
+                reference = decode_reference(body, i, final)
+                if reference is None:
+                    break
+                characters, i = reference
+                parts.append(characters)
+                continue
+
+            if c == ">":
+                self.in_tag = False
+                i += 1
+                token = parse_tag("".join(parts))
+                parts = []
+                if token:
+                    yield token
+                continue
+
+            if not self.in_tag:
+                if not final and len(body) - i < 4 and "<!--".startswith(body[i:]):
+                    break
+                if body.startswith("<!--", i):
+                    text = "".join(parts)
+                    parts = []
+                    self.in_comment = True
+                    i += 4
+                    if text:
+                        yield Characters(text)
+                    continue
+            self.in_tag = True
+            text = "".join(parts)
+            parts = []
+            i += 1
+            if text:
+                yield Characters(text)
+
+        self.text = "".join(parts)
+        self.buffer = body[i:]
+
+
+def iter_tokens(source):
+    # Takes a string, an iterable of strings or a text file. Tokens come out
+    # as the input is read, so a consumer can stop without reading the rest
+    if isinstance(source, str):
+        source = [source]
+    elif hasattr(source, "read"):
+        file = source
+        source = iter(lambda: file.read(READ_SIZE), "")
+    tokenizer = HTMLTokenizer()
+    for chunk in source:
+        yield from tokenizer.feed(chunk)
+    yield from tokenizer.close()
+
+
+def sax_parse(source, handler):  # noqa: vulture
+    # Calls handler.start_tag(tag, attributes), end_tag(tag), text(text) and
+    # comment(text) where the handler has them. A callback that returns True
+    # stops the parse
+    for token in iter_tokens(source):
+        if isinstance(token, StartTag):
+            callback, args = "start_tag", (token.tag, token.attributes)
+        elif isinstance(token, EndTag):
+            callback, args = "end_tag", (token.tag,)
+        elif isinstance(token, Characters):
+            callback, args = "text", (token.text,)
+        else:
+            callback, args = "comment", (token.text,)
+        method = getattr(handler, callback, None)
+        if method and method(*args):
+            return
@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# Keep the on-disk HTTP cache out of the user's home directory during tests
+os.environ["XDG_CACHE_HOME"] = tempfile.mkdtemp(prefix="webskater-tests-")
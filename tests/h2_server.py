@@ -0,0 +1,88 @@
+import socketserver
+import ssl
+import threading
+import time
+
+from src.hpack import Decoder, Encoder
+from src.http2 import (
+    ACK,
+    CONTINUATION,
+    DATA,
+    END_HEADERS,
+    END_STREAM,
+    HEADERS,
+    PREFACE,
+    SETTINGS,
+    encode_frame,
+    encode_settings,
+    read_frame,
+)
+from src.response import ResponseReader
+
+
+class H2Handler(socketserver.BaseRequestHandler):
+    routes = {}
+    connections = []
+
+    def handle(self):
+        self.connections.append(self.client_address)
+        self.reader = ResponseReader(self.request)
+        self.encoder = Encoder()
+        self.decoder = Decoder()
+        self.lock = threading.Lock()
+        if self.reader.read(len(PREFACE)) != PREFACE:
+            return
+        self.send(encode_settings([]))
+
+        block = bytearray()
+        while True:
+            try:
+                type, flags, stream_id, payload = read_frame(self.reader)
+            except OSError:
+                return
+            if type == SETTINGS and not flags & ACK:
+                self.send(encode_frame(SETTINGS, ACK, 0))
+            elif type in [HEADERS, CONTINUATION]:
+                block += payload
+                if flags & END_HEADERS:
+                    headers = dict(self.decoder.decode(block))
+                    block = bytearray()
+                    # Answer each stream on its own thread so a slow response
+                    # does not hold up the ones behind it
+                    threading.Thread(
+                        target=self.respond, args=(stream_id, headers), daemon=True
+                    ).start()
+
+    def respond(self, stream_id, request):
+        route = self.routes.get(request[":path"], (404, {}, b"not found"))
+        status, headers, body, *delay = route
+        time.sleep(delay[0] if delay else 0)
+        fields = [(":status", str(status))]
+        fields += [(name.casefold(), value) for name, value in headers.items()]
+        fields.append(("content-length", str(len(body))))
+        # Header blocks must reach the peer in the order they were encoded
+        with self.lock:
+            block = self.encoder.encode(fields)
+            self.request.sendall(
+                encode_frame(HEADERS, END_HEADERS, stream_id, block)
+                + encode_frame(DATA, END_STREAM, stream_id, body)
+            )
+
+    def send(self, data):
+        with self.lock:
+            self.request.sendall(data)
+
+
+def serve_h2(routes, certfile=None):
+    handler = type(
+        "H2RoutesHandler", (H2Handler,), {"routes": routes, "connections": []}
+    )
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    if certfile:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(certfile)
+        context.set_alpn_protocols(["h2"])
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, server.server_address[1], handler.connections
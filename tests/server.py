@@ -0,0 +1,30 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    routes = {}
+
+    def do_GET(self):
+        route = self.routes.get(self.path, (404, {}, b"not found"))
+        status, headers, body, *delay = route
+        time.sleep(delay[0] if delay else 0)
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        if "Transfer-Encoding" not in headers:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(routes):
+    handler = type("RoutesHandler", (Handler,), {"routes": routes})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, server.server_address[1]
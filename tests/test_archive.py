@@ -0,0 +1,66 @@
+import gzip
+import os
+import tempfile
+import time
+import unittest
+
+from src.archive import archive
+from src.browser import URL
+from src.data import errors
+from tests.server import serve
+
+TEXT = "<p>西遊記 journey to the west</p>".encode("utf8") * 50
+
+
+class TestArchive(unittest.TestCase):
+    def setUp(self):
+        self.server, port = serve(
+            {
+                "/": (
+                    200,
+                    {"Content-Type": "text/html", "Content-Encoding": "gzip"},
+                    gzip.compress(TEXT),
+                ),
+                "/moved": (301, {"Location": "/"}, b""),
+            }
+        )
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.addCleanup(archive.stop)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "archive.json")
+        self.origin = f"http://127.0.0.1:{port}"
+
+    def record(self, *paths):
+        archive.record(self.path)
+        for path in paths:
+            URL(self.origin + path).request()
+        archive.save()
+        # Replay must not need the server at all
+        self.server.shutdown()
+
+    def test_replay(self):
+        self.record("/")
+        archive.replay(self.path)
+        self.assertEqual(URL(self.origin + "/").request(), TEXT.decode("utf8"))
+
+    def test_replay_redirect(self):
+        self.record("/moved")
+        archive.replay(self.path)
+        self.assertEqual(
+            archive.entries.keys(), {self.origin + "/moved", self.origin + "/"}
+        )
+        self.assertEqual(URL(self.origin + "/moved").request(), TEXT.decode("utf8"))
+
+    def test_missing_entry(self):
+        self.record("/")
+        archive.replay(self.path)
+        self.assertEqual(URL(self.origin + "/missing").request(), errors.not_archived)
+
+    def test_simulated_network(self):
+        self.record("/")
+        archive.replay(self.path, latency=0.1, bandwidth=len(TEXT) * 4)
+        start = time.monotonic()
+        URL(self.origin + "/").request()
+        self.assertGreaterEqual(time.monotonic() - start, 0.1)
@@ -0,0 +1,105 @@
+import unittest
+
+from src.browser import URL
+from src.cache import CacheEntry, ResponseCache, cache, freshness_lifetime
+from tests.server import serve
+
+
+class TestFreshness(unittest.TestCase):
+    def test_max_age(self):
+        self.assertEqual(freshness_lifetime({"cache-control": "max-age=60"}), 60)
+
+    def test_max_age_wins_over_expires(self):
+        headers = {
+            "cache-control": "public, max-age=5",
+            "expires": "Thu, 01 Jan 1970 00:00:00 GMT",
+        }
+        self.assertEqual(freshness_lifetime(headers), 5)
+
+    def test_expires(self):
+        headers = {
+            "date": "Thu, 01 Jan 2026 00:00:00 GMT",
+            "expires": "Thu, 01 Jan 2026 00:10:00 GMT",
+        }
+        self.assertEqual(freshness_lifetime(headers), 600)
+
+    def test_no_cache(self):
+        self.assertEqual(freshness_lifetime({"cache-control": "no-cache"}), 0)
+        self.assertEqual(freshness_lifetime({"expires": "0"}), 0)
+        self.assertIsNone(freshness_lifetime({}))
+
+
+class TestResponseCache(unittest.TestCase):
+    def test_hit_and_miss(self):
+        cache = ResponseCache()
+        cache.put("a", CacheEntry(200, {"cache-control": "max-age=60"}, "a"))
+
+        self.assertEqual(cache.get("a").content, "a")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_not_stored(self):
+        cache = ResponseCache()
+        cache.put("a", CacheEntry(200, {"cache-control": "no-store, max-age=60"}, "a"))
+        cache.put("b", CacheEntry(200, {}, "b"))
+        cache.put("c", CacheEntry(500, {"cache-control": "max-age=60"}, "c"))
+
+        for key in "abc":
+            self.assertIsNone(cache.get(key))
+
+    def test_stale_entries(self):
+        cache = ResponseCache()
+        cache.put("a", CacheEntry(200, {"cache-control": "no-cache"}, "a"))
+        cache.put("b", CacheEntry(200, {"etag": '"v1"'}, "b"))
+
+        self.assertFalse(cache.get("a").is_fresh())
+        self.assertEqual(cache.get("b").validators(), {"If-None-Match": '"v1"'})
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+
+    def test_lru_eviction(self):
+        headers = {"cache-control": "max-age=60"}
+        cache = ResponseCache()
+        cache.put("a", CacheEntry(200, headers, "a" * 100))
+        cache.max_bytes = cache.size * 2
+        cache.put("b", CacheEntry(200, headers, "b" * 100))
+        cache.get("a")
+        cache.put("c", CacheEntry(200, headers, "c" * 100))
+
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+        self.assertEqual(cache.evictions, 1)
+        self.assertLessEqual(cache.size, cache.max_bytes)
+
+
+class TestRequestCache(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(cache.clear)
+
+    def test_request_uses_cache(self):
+        routes = {"/": (200, {"Cache-Control": "max-age=60"}, b"first")}
+        server, port = serve(routes)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        self.assertEqual(URL(f"http://127.0.0.1:{port}/").request(), "first")
+        routes["/"] = (200, {}, b"second")
+        self.assertEqual(URL(f"http://127.0.0.1:{port}/").request(), "first")
+
+
+class TestUrlKey(unittest.TestCase):
+    def test_normalized(self):
+        self.assertEqual(str(URL("http://Example.net:80")), "http://example.net/")
+        self.assertEqual(
+            str(URL("https://example.net:8443/a")), "https://example.net:8443/a"
+        )
+
+
+class TestClear(unittest.TestCase):
+    def test_clear(self):
+        cache = ResponseCache()
+        cache.put("a", CacheEntry(200, {"cache-control": "max-age=60"}, "a"))
+        cache.clear()
+
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.size, 0)
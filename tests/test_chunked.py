@@ -0,0 +1,39 @@
+import io
+import unittest
+
+from src.browser import URL
+from src.chunked import read_chunked
+from tests.server import serve
+
+CHUNKED_BODY = (
+    b"5\r\n<p>hi\r\n6;ext=1\r\n there\r\n4\r\n</p>\r\n0\r\nX-Trailer: 1\r\n\r\n"
+)
+
+
+class TestChunked(unittest.TestCase):
+    def test_decodes_chunks(self):
+        response = io.BytesIO(CHUNKED_BODY + b"next response")
+        chunks = list(read_chunked(response))
+
+        self.assertEqual(chunks, [b"<p>hi", b" there", b"</p>"])
+        self.assertEqual(response.read(), b"next response")
+
+    def test_yields_before_body_is_complete(self):
+        response = io.BytesIO(b"3\r\nabc\r\n")
+        chunks = read_chunked(response)
+
+        self.assertEqual(next(chunks), b"abc")
+        with self.assertRaises(ConnectionResetError):
+            next(chunks)
+
+    def test_chunked_response(self):
+        server, port = serve(
+            {"/": (200, {"Transfer-Encoding": "chunked"}, CHUNKED_BODY)}
+        )
+        try:
+            url = URL(f"http://127.0.0.1:{port}/")
+            self.assertEqual(url.request(), "<p>hi there</p>")
+            self.assertEqual(url.request(), "<p>hi there</p>")
+        finally:
+            server.shutdown()
+            server.server_close()
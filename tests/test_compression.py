@@ -0,0 +1,47 @@
+import gzip
+import unittest
+import zlib
+
+from src.browser import URL
+from src.compression import decode_content
+from tests.server import serve
+
+TEXT = "<p>西遊記 journey to the west</p>".encode("utf8") * 50
+
+
+def pieces(data, size=7):
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+class TestCompression(unittest.TestCase):
+    def test_gzip(self):
+        chunks = decode_content(pieces(gzip.compress(TEXT)), "gzip")
+        self.assertEqual(b"".join(chunks), TEXT)
+
+    def test_deflate(self):
+        chunks = decode_content(pieces(zlib.compress(TEXT)), "deflate")
+        self.assertEqual(b"".join(chunks), TEXT)
+
+    def test_raw_deflate(self):
+        compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+        data = compressor.compress(TEXT) + compressor.flush()
+        self.assertEqual(b"".join(decode_content(pieces(data), "deflate")), TEXT)
+
+    def test_identity(self):
+        self.assertEqual(b"".join(decode_content([TEXT], "")), TEXT)
+
+    def test_unsupported(self):
+        with self.assertRaises(ValueError):
+            list(decode_content([TEXT], "br"))
+
+    def test_gzip_response(self):
+        server, port = serve(
+            {"/": (200, {"Content-Encoding": "gzip"}, gzip.compress(TEXT))}
+        )
+        try:
+            self.assertEqual(
+                URL(f"http://127.0.0.1:{port}/").request(), TEXT.decode("utf8")
+            )
+        finally:
+            server.shutdown()
+            server.server_close()
@@ -0,0 +1,43 @@
+import unittest
+
+from src.browser import URL
+from src.connection import IDLE_TIMEOUT, pool
+from tests.server import serve
+
+
+class TestConnectionPool(unittest.TestCase):
+    def setUp(self):
+        self.server, port = serve(
+            {"/": (200, {}, b"<p>hello</p>"), "/other": (200, {}, b"other")}
+        )
+        self.origin = f"http://127.0.0.1:{port}"
+        self.hits, self.misses = pool.hits, pool.misses
+
+    def tearDown(self):
+        pool.idle_timeout = IDLE_TIMEOUT
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_reuses_connection(self):
+        self.assertEqual(URL(self.origin + "/").request(), "<p>hello</p>")
+        self.assertEqual(URL(self.origin + "/other").request(), "other")
+        self.assertEqual(pool.misses - self.misses, 1)
+        self.assertEqual(pool.hits - self.hits, 1)
+
+    def test_idle_timeout(self):
+        pool.idle_timeout = 0
+        URL(self.origin + "/").request()
+        URL(self.origin + "/").request()
+        self.assertEqual(pool.misses - self.misses, 2)
+        self.assertEqual(pool.hits - self.hits, 0)
+
+    def test_failed_response_releases_connection(self):
+        server, port = serve({"/": (200, {"Content-Encoding": "br"}, b"?")})
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        key = ("http", "127.0.0.1", port)
+
+        for _ in range(pool.max_per_host + 1):
+            with self.assertRaises(ValueError):
+                URL(f"http://127.0.0.1:{port}/").request()
+        self.assertEqual(pool.in_use[key], 0)
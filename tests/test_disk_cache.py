@@ -0,0 +1,106 @@
+import os
+import tempfile
+import unittest
+
+from src.browser import URL
+from src.cache import CacheEntry, cache
+from src.disk_cache import DiskCache, disk_cache
+from src.fetch import fetch_many
+from tests.server import Handler, serve
+
+
+class TestDiskCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def test_round_trip(self):
+        headers = {"cache-control": "max-age=60", "etag": '"v1"'}
+        DiskCache(self.directory).put("key", CacheEntry(200, headers, "西遊記"))
+
+        # A second instance stands in for another browser process
+        entry = DiskCache(self.directory).get("key")
+        self.assertEqual(entry.content, "西遊記")
+        self.assertEqual(entry.headers, headers)
+        self.assertTrue(entry.is_fresh())
+
+    def test_not_stored(self):
+        cache = DiskCache(self.directory)
+        cache.put("key", CacheEntry(200, {"cache-control": "no-store"}, "x"))
+
+        self.assertIsNone(cache.get("key"))
+
+    def test_eviction(self):
+        headers = {"cache-control": "max-age=60"}
+        cache = DiskCache(self.directory, max_bytes=250)
+        for key in "abc":
+            cache.put(key, CacheEntry(200, headers, key * 100))
+
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("c").content, "c" * 100)
+        self.assertEqual(len(os.listdir(self.directory)), 4)
+
+    def test_corrupt_index(self):
+        headers = {"cache-control": "max-age=60"}
+        cache = DiskCache(self.directory)
+        cache.put("a", CacheEntry(200, headers, "a"))
+        with open(cache.index_path, "w") as file:
+            file.write("{not json")
+
+        self.assertIsNone(DiskCache(self.directory).get("a"))
+        self.assertEqual(
+            sorted(os.listdir(self.directory)), ["index.json", "index.lock"]
+        )
+
+    def test_shared_index(self):
+        headers = {"cache-control": "max-age=60"}
+        first, second = DiskCache(self.directory), DiskCache(self.directory)
+        first.put("a", CacheEntry(200, headers, "a"))
+        second.put("b", CacheEntry(200, headers, "b"))
+
+        self.assertEqual(first.get("b").content, "b")
+        self.assertEqual(second.get("a").content, "a")
+
+
+class RevalidatingHandler(Handler):
+    requests = []
+
+    def do_GET(self):
+        self.requests.append(self.headers.get("If-None-Match"))
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.send_header("ETag", '"v1"')
+            self.end_headers()
+            return
+        body = b"<p>cached</p>"
+        self.send_response(200)
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class TestRevalidation(unittest.TestCase):
+    def setUp(self):
+        RevalidatingHandler.requests = []
+        server, port = serve({})
+        server.RequestHandlerClass = RevalidatingHandler
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.url = f"http://127.0.0.1:{port}/"
+        self.addCleanup(cache.clear)
+
+    def test_not_modified(self):
+        self.assertEqual(URL(self.url).request(), "<p>cached</p>")
+        # Drop the memory copy so the entry comes from disk, as after a restart
+        cache.clear()
+        self.assertEqual(URL(self.url).request(), "<p>cached</p>")
+
+        self.assertEqual(RevalidatingHandler.requests, [None, '"v1"'])
+        self.assertEqual(disk_cache.get(self.url).content, "<p>cached</p>")
+
+    def test_async_not_modified(self):
+        URL(self.url).request()
+        [(_, content)] = fetch_many([URL(self.url)])
+
+        self.assertEqual(content, "<p>cached</p>")
+        self.assertEqual(RevalidatingHandler.requests, [None, '"v1"'])
@@ -0,0 +1,56 @@
+import unittest
+
+from src.browser import HTMLParser
+from src.entities import decode_reference
+
+
+def decode(text, final=True):
+    reference = decode_reference(text, 0, final)
+    return reference and (reference[0], text[reference[1] :])
+
+
+class TestEntities(unittest.TestCase):
+    def test_named(self):
+        self.assertEqual(decode("&amp; rest"), ("&", " rest"))
+        self.assertEqual(decode("&hearts;"), ("♥", ""))
+
+    def test_longest_match(self):
+        self.assertEqual(decode("&notin;"), ("∉", ""))
+        # "&not" is a legacy name that works without a semicolon
+        self.assertEqual(decode("&notit;"), ("¬", "it;"))
+        self.assertEqual(decode("&copyright"), ("©", "right"))
+
+    def test_not_a_reference(self):
+        self.assertEqual(decode("& chips"), ("&", " chips"))
+        self.assertEqual(decode("&nosuch;"), ("&", "nosuch;"))
+        self.assertEqual(decode("&#;"), ("&", "#;"))
+        self.assertEqual(decode("&#xg"), ("&", "#xg"))
+
+    def test_numeric(self):
+        self.assertEqual(decode("&#169;"), ("©", ""))
+        self.assertEqual(decode("&#x2665 and"), ("♥", " and"))
+        self.assertEqual(decode("&#X41;"), ("A", ""))
+
+    def test_replacements(self):
+        self.assertEqual(decode("&#128;"), ("€", ""))
+        self.assertEqual(decode("&#x9F;"), ("Ÿ", ""))
+        self.assertEqual(decode("&#0;"), ("�", ""))
+        self.assertEqual(decode("&#xD800;"), ("�", ""))
+        self.assertEqual(decode("&#99999999999;"), ("�", ""))
+        self.assertEqual(decode("&#x0000000041;"), ("A", ""))
+        self.assertEqual(decode("&#" + "9" * 5000 + ";"), ("�", ""))
+        self.assertEqual(decode("&#x" + "f" * 5000), ("�", ""))
+
+    def test_needs_more_text(self):
+        for partial in ["&", "&am", "&#", "&#x", "&#16", "&not"]:
+            self.assertIsNone(decode(partial, final=False), partial)
+        self.assertEqual(decode("&am", final=True), ("&", "am"))
+        self.assertEqual(decode("&#16", final=True), ("\x10", ""))
+
+    def test_parser(self):
+        text = HTMLParser("<p>&lt;&#x3C;&#60;&amp</p>").parse().children[0]
+        self.assertEqual(text.children[0].children[0].text, "<<<&")
+
+    def test_parser_long_number(self):
+        root = HTMLParser("<p>&#" + "1" * 5000 + "</p>").parse()
+        self.assertEqual(root.children[0].children[0].children[0].text, "�")
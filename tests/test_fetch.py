@@ -0,0 +1,77 @@
+import time
+import unittest
+
+from src.browser import URL
+from src.fetch import fetch_many
+from src.response import ResponseTooLarge, body_limits
+from tests.server import serve
+
+
+class TestFetch(unittest.TestCase):
+    def setUp(self):
+        self.server, port = serve(
+            {
+                "/slow": (200, {}, b"slow", 0.3),
+                "/fast": (200, {}, b"fast"),
+                "/a": (200, {}, b"a", 0.2),
+                "/b": (200, {}, b"b", 0.2),
+                "/c": (200, {}, b"c", 0.2),
+                "/bad": (200, {"Content-Encoding": "gzip"}, b"not gzip"),
+                "/big": (200, {}, b"big " * 1000),
+            }
+        )
+        self.origin = f"http://127.0.0.1:{port}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_completion_order(self):
+        urls = [URL(self.origin + "/slow"), URL(self.origin + "/fast")]
+        results = fetch_many(urls)
+
+        self.assertEqual([content for _, content in results], ["fast", "slow"])
+        self.assertIs(results[0][0], urls[1])
+
+    def test_concurrent(self):
+        start = time.monotonic()
+        results = fetch_many([URL(self.origin + path) for path in ["/a", "/b", "/c"]])
+
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(sorted(content for _, content in results), ["a", "b", "c"])
+
+    def test_host_limit(self):
+        start = time.monotonic()
+        fetch_many(
+            [URL(self.origin + path) for path in ["/a", "/b", "/c"]], max_per_host=1
+        )
+
+        self.assertGreaterEqual(time.monotonic() - start, 0.6)
+
+    def test_other_schemes(self):
+        results = fetch_many([URL("data:text/html,hi"), URL("invalid")])
+        self.assertEqual(len(results), 2)
+
+    def test_errors(self):
+        [(_, error)] = fetch_many([URL("http://127.0.0.1:1/")])
+        self.assertIsInstance(error, OSError)
+
+    def test_bad_response_does_not_abort_batch(self):
+        bad, fast = URL(self.origin + "/bad"), URL(self.origin + "/fast")
+        results = dict(fetch_many([bad, fast]))
+
+        self.assertIsInstance(results[bad], Exception)
+        self.assertEqual(results[fast], "fast")
+
+    def test_body_limits(self):
+        self.addCleanup(setattr, body_limits, "memory", body_limits.memory)
+        self.addCleanup(setattr, body_limits, "maximum", body_limits.maximum)
+        big = URL(self.origin + "/big")
+
+        body_limits.memory = 100
+        [(_, content)] = fetch_many([big])
+        self.assertEqual(content, "big " * 1000)
+
+        body_limits.maximum = 1000
+        [(_, error)] = fetch_many([big])
+        self.assertIsInstance(error, ResponseTooLarge)
@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from src import file
+from src.browser import URL
+from src.file import file_cache, read_file
+
+TEXT = "<p>西遊記 journey to the west</p>" * 100
+
+
+class TestFile(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(file_cache.clear)
+        self.path = os.path.join(directory.name, "page.html")
+        self.write(TEXT.encode("utf8"))
+
+    def write(self, data):
+        with open(self.path, "wb") as f:
+            f.write(data)
+
+    def test_streams_chunks(self):
+        received = []
+        # Small chunks split the multi-byte characters between them
+        with mock.patch.object(file, "FILE_CHUNK_SIZE", 7):
+            with mock.patch.object(file, "STREAM_ONLY_BYTES", 100):
+                content = URL("file://" + self.path).request(received.append)
+
+        # A big file only goes to the stream and is not kept
+        self.assertIsNone(content)
+        self.assertEqual("".join(received), TEXT)
+        self.assertGreater(len(received), 1)
+        self.assertEqual(file_cache.size, 0)
+
+    def test_streams_small_file(self):
+        received = []
+        content = URL("file://" + self.path).request(received.append)
+
+        self.assertEqual(content, TEXT)
+        self.assertEqual(received, [TEXT])
+
+    def test_meta_charset(self):
+        page = '<meta charset="iso-8859-1"><p>café</p>'
+        self.write(page.encode("latin-1"))
+        self.assertEqual(read_file(self.path), page)
+
+    def test_empty_file(self):
+        self.write(b"")
+        self.assertEqual(read_file(self.path), "")
+
+    def test_cache(self):
+        self.assertEqual(read_file(self.path), TEXT)
+        with mock.patch.object(file, "decode_mapped") as decode:
+            self.assertEqual(read_file(self.path), TEXT)
+        decode.assert_not_called()
+
+        self.write(b"<p>changed</p>")
+        self.assertEqual(read_file(self.path), "<p>changed</p>")
@@ -0,0 +1,172 @@
+import os
+import socket
+import struct
+import time
+import unittest
+
+from src.browser import URL
+from src.data import errors
+from src.hpack import Decoder, Encoder, huffman_decode, huffman_encode
+from src.http2 import (
+    END_HEADERS,
+    END_STREAM,
+    GOAWAY,
+    HEADERS,
+    H2Connection,
+    encode_frame,
+    h2_connections,
+    request_headers,
+)
+from src.response import body_limits
+from src.timing import timings
+from src.tls import tls
+from tests.h2_server import serve_h2
+
+CERT = os.path.join(os.path.dirname(__file__), "certs", "localhost.pem")
+
+
+def close_connections():
+    for connection in h2_connections.connections.values():
+        connection.s.close()
+    h2_connections.connections.clear()
+
+
+class TestHPACK(unittest.TestCase):
+    def test_huffman(self):
+        # RFC 7541 C.4.1
+        encoded = bytes.fromhex("f1e3c2e5f23a6ba0ab90f4ff")
+        self.assertEqual(huffman_encode(b"www.example.com"), encoded)
+        self.assertEqual(huffman_decode(encoded), b"www.example.com")
+
+    def test_decode_requests(self):
+        # RFC 7541 C.4.1 and C.4.2 share one dynamic table
+        decoder = Decoder()
+        first = decoder.decode(bytes.fromhex("828684418cf1e3c2e5f23a6ba0ab90f4ff"))
+        second = decoder.decode(bytes.fromhex("828684be5886a8eb10649cbf"))
+
+        self.assertEqual(first[-1], (":authority", "www.example.com"))
+        self.assertEqual(
+            second[-2:],
+            [(":authority", "www.example.com"), ("cache-control", "no-cache")],
+        )
+
+    def test_round_trip(self):
+        encoder, decoder = Encoder(), Decoder()
+        headers = [(":method", "GET"), (":path", "/a"), ("user-agent", "Webskater")]
+        for _ in range(2):
+            self.assertEqual(decoder.decode(encoder.encode(headers)), headers)
+
+
+class TestHTTP2(unittest.TestCase):
+    def setUp(self):
+        routes = {
+            "/": (200, {"Content-Type": "text/html"}, b"over h2"),
+            "/slow": (200, {}, b"slow", 0.5),
+            "/fast": (200, {}, b"fast"),
+            "/big": (200, {}, b"big " * 10000),
+        }
+        self.server, self.port, self.connections = serve_h2(routes)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.addCleanup(close_connections)
+        self.addCleanup(h2_connections.prior_knowledge.clear)
+        h2_connections.prior_knowledge.add(("127.0.0.1", self.port))
+
+    def url(self, path):
+        return URL(f"http://127.0.0.1:{self.port}{path}")
+
+    def test_request(self):
+        self.assertEqual(self.url("/").request(), "over h2")
+        self.assertEqual(self.url("/fast").request(), "fast")
+        self.assertEqual(len(self.connections), 1)
+
+        (timing,) = timings.get(self.url("/fast"))
+        self.assertEqual(timing.http_version, "HTTP/2")
+        self.assertTrue(timing.reused)
+        self.assertEqual(timing.body_bytes, len(b"fast"))
+
+    def test_multiplexing(self):
+        self.url("/").request()
+        connection = h2_connections.get(("http", "127.0.0.1", self.port))
+        slow = connection.open_stream(request_headers(self.url("/slow"), {}))
+        fast = connection.open_stream(request_headers(self.url("/fast"), {}))
+
+        start = time.monotonic()
+        _, _, body = connection.wait(fast)
+        self.assertEqual(b"".join(body), b"fast")
+        # The fast response is not stuck behind the slow one
+        self.assertLess(time.monotonic() - start, 0.4)
+        _, _, body = connection.wait(slow)
+        self.assertEqual(b"".join(body), b"slow")
+        self.assertEqual(len(self.connections), 1)
+
+    def test_request_many(self):
+        self.url("/").request()
+        connection = h2_connections.get(("http", "127.0.0.1", self.port))
+        urls = [self.url(path) for path in ["/slow", "/fast", "/"]]
+        results = connection.request_many([request_headers(url, {}) for url in urls])
+
+        self.assertEqual(
+            [b"".join(body) for _, _, body in results], [b"slow", b"fast", b"over h2"]
+        )
+
+    def test_body_limits(self):
+        self.addCleanup(setattr, body_limits, "maximum", body_limits.maximum)
+        body_limits.maximum = 1000
+        self.assertEqual(self.url("/big").request(), errors.response_too_large)
+
+        # Only the one stream was cancelled; the connection carries on
+        body_limits.maximum = 100000
+        self.assertEqual(self.url("/big").request(), "big " * 10000)
+        self.assertEqual(len(self.connections), 1)
+
+
+class TestConnectionClose(unittest.TestCase):
+    def connection(self):
+        a, self.peer = socket.socketpair()
+        self.addCleanup(a.close)
+        self.addCleanup(self.peer.close)
+        return H2Connection(a)
+
+    def test_closed_by_peer(self):
+        connection = self.connection()
+        self.peer.close()
+        connection.step()
+        self.assertTrue(connection.closed)
+        self.assertEqual(connection.s.fileno(), -1)
+
+    def test_goaway(self):
+        connection = self.connection()
+        stream = connection.open_stream([(":path", "/")])
+        goaway = encode_frame(GOAWAY, 0, 0, struct.pack(">II", stream.id, 0))
+        self.peer.sendall(goaway)
+        connection.step()
+        # The stream the server did take on still gets its response
+        self.assertTrue(connection.closed)
+        self.assertNotEqual(connection.s.fileno(), -1)
+
+        block = Encoder().encode([(":status", "204")])
+        flags = END_HEADERS | END_STREAM
+        self.peer.sendall(encode_frame(HEADERS, flags, stream.id, block))
+        self.assertEqual(connection.wait(stream)[0], 204)
+        self.assertEqual(connection.s.fileno(), -1)
+
+
+class TestALPN(unittest.TestCase):
+    def setUp(self):
+        self.server, port, self.connections = serve_h2(
+            {"/": (200, {}, b"secure h2")}, certfile=CERT
+        )
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.addCleanup(close_connections)
+        self.addCleanup(setattr, tls, "contexts", tls.contexts)
+        self.addCleanup(setattr, tls, "cafile", tls.cafile)
+        tls.contexts = {}
+        tls.cafile = CERT
+        self.url = f"https://localhost:{port}/"
+
+    def test_negotiates_h2(self):
+        self.assertEqual(URL(self.url).request(), "secure h2")
+        self.assertEqual(URL(self.url).request(), "secure h2")
+        self.assertEqual(len(self.connections), 1)
@@ -0,0 +1,21 @@
+import unittest
+
+from src.browser import HSTEP, VSTEP, DocumentLayout, HTMLParser
+
+# No text, so no fonts are needed and layout runs without a display
+DOCUMENT = "<head><title></title></head><div><ul><li></li><li></li></ul></div><p></p>"
+
+
+class TestBlockLayout(unittest.TestCase):
+    def test_lays_out_blocks(self):
+        document = DocumentLayout(HTMLParser(DOCUMENT).parse(), 800)
+        document.layout()
+
+        html = document.children[0]
+        self.assertEqual((html.x, html.y, html.width), (HSTEP, VSTEP, 800 - 2 * HSTEP))
+        body = html.children[0]
+        self.assertEqual(body.node.tag, "body")
+        self.assertEqual([child.node.tag for child in body.children], ["div", "p"])
+        items = body.children[0].children[0].children
+        self.assertTrue(all(item.list_item for item in items))
+        self.assertEqual(document.height, 0)
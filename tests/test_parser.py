@@ -0,0 +1,146 @@
+import gc
+import unittest
+import weakref
+
+from src.browser import HTMLParser, URL
+from tests.server import serve
+
+DOCUMENT = (
+    "<!doctype html><html><head><title>T &amp; T</title></head>"
+    "<body><p class='x'>fish &amp chips &copy; 2024</p><!-- a > comment -->"
+    "<ul><li>one<li>two</ul><p>&lt;div&gt; &notin; &notit;</p>"
+    "<p>&#169; &#x2665 &#X80; &#12345678; &#xz</p></body></html>"
+)
+
+
+def dump(node):
+    children = "".join(dump(child) for child in node.children)
+    return "{}[{}]".format(repr(node), children)
+
+
+class TestIncrementalParser(unittest.TestCase):
+    def test_every_split_point(self):
+        expected = dump(HTMLParser(DOCUMENT).parse())
+        for i in range(len(DOCUMENT) + 1):
+            parser = HTMLParser()
+            parser.feed(DOCUMENT[:i])
+            parser.feed(DOCUMENT[i:])
+            self.assertEqual(dump(parser.close()), expected, i)
+
+    def test_one_character_at_a_time(self):
+        parser = HTMLParser()
+        for c in DOCUMENT:
+            parser.feed(c)
+        self.assertEqual(dump(parser.close()), dump(HTMLParser(DOCUMENT).parse()))
+
+    def test_partial_tree(self):
+        parser = HTMLParser()
+        parser.feed("<p>first</p><p>sec")
+
+        root = parser.root()
+        self.assertEqual(dump(root), "<html>[<body>[<p>['first'[]]<p>[]]]")
+        parser.feed("ond</p>")
+        self.assertIs(parser.close(), root)
+        self.assertEqual(dump(root), "<html>[<body>[<p>['first'[]]<p>['second'[]]]]")
+
+
+def parse(body):
+    return dump(HTMLParser(body).parse())
+
+
+def depth(node):
+    return 1 + max((depth(child) for child in node.children), default=0)
+
+
+class TestTreeBuilder(unittest.TestCase):
+    def test_implied_html_head_body(self):
+        self.assertEqual(
+            parse("<title>T</title><p>x"),
+            "<html>[<head>[<title>['T'[]]]<body>[<p>['x'[]]]]",
+        )
+        self.assertEqual(parse(""), "<html>[<body>[]]")
+
+    def test_paragraphs_close(self):
+        self.assertEqual(
+            parse("<p>a<p>b<div>c</div>"),
+            "<html>[<body>[<p>['a'[]]<p>['b'[]]<div>['c'[]]]]",
+        )
+        self.assertEqual(parse("a</p>"), "<html>[<body>['a'[]<p>[]]]")
+
+    def test_list_items_close(self):
+        self.assertEqual(
+            parse("<ul><li>a<li>b<ul><li>c</ul><li>d</ul>"),
+            "<html>[<body>[<ul>[<li>['a'[]]<li>['b'[]<ul>[<li>['c'[]]]]<li>['d'[]]]]]",
+        )
+
+    def test_end_tags_out_of_scope(self):
+        self.assertEqual(
+            parse("<table><td><p>a</div>b</table>c"),
+            "<html>[<body>[<table>[<td>[<p>['a'[]'b'[]]]]'c'[]]]",
+        )
+
+    def test_repeated_body_merges_attributes(self):
+        root = HTMLParser("<body a=1><p>x</p></body><body b=2>y").parse()
+        body = root.children[0]
+        self.assertEqual(body.attributes, {"a": "1", "b": "2"})
+        self.assertEqual(len(body.children), 2)
+
+    def test_implied_elements_own_attributes(self):
+        root = HTMLParser("x</p>").parse()
+        body = root.children[0]
+        body.attributes["id"] = "b"
+        self.assertEqual(root.attributes, {})
+        self.assertEqual(body.children[1].attributes, {})
+
+    def test_unclosed_items_stay_shallow(self):
+        root = HTMLParser("<ul>" + "<li><p>item" * 10000).parse()
+        self.assertEqual(depth(root), 6)
+
+
+class TestNodes(unittest.TestCase):
+    def test_tree_freed_without_collector(self):
+        root = HTMLParser("<title>t</title><ul><li>a<li><b>b</b></ul>").parse()
+        text = root.children[1].children[0].children[1].children[0].children[0]
+        self.assertEqual(text.parent.tag, "b")
+        ref = weakref.ref(root)
+        gc.disable()
+        self.addCleanup(gc.enable)
+        del root
+        self.assertIsNone(ref())
+        self.assertIsNone(text.parent)
+
+    def test_names_shared(self):
+        root = HTMLParser("<div CLASS=a></div><div class=b></div>").parse()
+        first, second = root.children[0].children
+        self.assertIs(first.tag, second.tag)
+        self.assertIs(*[next(iter(node.attributes)) for node in (first, second)])
+        self.assertEqual(first.children, ())
+
+
+class TestStreamingRequest(unittest.TestCase):
+    def test_receives_text_in_pieces(self):
+        body = ("<p>西遊記</p>" * 2000).encode("utf8")
+        chunked = b"".join(
+            b"%x\r\n%s\r\n" % (len(body[i : i + 1000]), body[i : i + 1000])
+            for i in range(0, len(body), 1000)
+        )
+        server, port = serve(
+            {
+                "/": (200, {"Transfer-Encoding": "chunked"}, chunked + b"0\r\n\r\n"),
+                "/moved": (302, {"Location": "/"}, b"<p>moved</p>"),
+            }
+        )
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        received = []
+        content = URL(f"http://127.0.0.1:{port}/moved").request(received.append)
+
+        self.assertGreater(len(received), 1)
+        self.assertEqual("".join(received), content)
+        self.assertEqual(content, body.decode("utf8"))
+
+    def test_non_network_content(self):
+        received = []
+        URL("data:text/html,<p>hi</p>").request(received.append)
+        self.assertEqual(received, ["<p>hi</p>"])
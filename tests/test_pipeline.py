@@ -0,0 +1,65 @@
+import unittest
+
+from src.browser import URL
+from src.connection import pool
+from src.pipeline import request_pipelined
+from src.timing import timings
+from tests.server import serve
+
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        routes = {f"/{i}": (200, {}, f"page {i}".encode()) for i in range(8)}
+        routes["/last"] = (200, {"Connection": "close"}, b"last")
+        routes["/bad"] = (200, {"Content-Encoding": "gzip"}, b"not gzip")
+        self.server, port = serve(routes)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.addCleanup(timings.clear)
+        self.origin = f"http://127.0.0.1:{port}"
+        self.misses = pool.misses
+
+    def test_pipelined(self):
+        urls = [URL(f"{self.origin}/{i}") for i in range(4)]
+        self.assertEqual(
+            request_pipelined(urls), ["page 0", "page 1", "page 2", "page 3"]
+        )
+        self.assertEqual(pool.misses - self.misses, 1)
+        self.assertEqual([timing.reused for timing in timings.get()][-3:], [True] * 3)
+
+    def test_depth(self):
+        urls = [URL(f"{self.origin}/{i}") for i in range(8)]
+        results = request_pipelined(urls, depth=3)
+
+        self.assertEqual(results, [f"page {i}" for i in range(8)])
+        self.assertEqual(pool.misses - self.misses, 1)
+
+    def test_retries_after_early_close(self):
+        paths = ["/0", "/last", "/1", "/2"]
+        results = request_pipelined([URL(self.origin + path) for path in paths])
+
+        self.assertEqual(results, ["page 0", "last", "page 1", "page 2"])
+        self.assertEqual(pool.misses - self.misses, 2)
+
+    def test_bad_response(self):
+        paths = ["/0", "/bad", "/1"]
+        results = request_pipelined([URL(self.origin + path) for path in paths])
+
+        self.assertEqual(results[0], "page 0")
+        self.assertIsInstance(results[1], Exception)
+        self.assertEqual(results[2], "page 1")
+        # The connection that carried the bad response was not reused
+        self.assertEqual(pool.misses - self.misses, 2)
+
+    def test_mixed_schemes(self):
+        urls = [URL("data:text/html,hi"), URL(f"{self.origin}/0")]
+        self.assertEqual(request_pipelined(urls), ["hi", "page 0"])
+
+    def test_encode_request(self):
+        request = URL("http://example.net/a?b").encode_request({"If-None-Match": "x"})
+
+        self.assertTrue(
+            request.startswith(b"GET /a?b HTTP/1.1\r\nHost: example.net\r\n")
+        )
+        self.assertIn(b"If-None-Match: x\r\n", request)
+        self.assertTrue(request.endswith(b"\r\n\r\n"))
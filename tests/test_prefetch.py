@@ -0,0 +1,67 @@
+import time
+import unittest
+
+from src.browser import URL, HTMLParser
+from src.cache import cache
+from src.prefetch import Prefetcher, prefetch_candidates
+from tests.server import serve
+
+PAGE = """<head><link rel="prefetch" href="/hint"><link rel=stylesheet href=/s.css></head>
+<a href="/next">next</a> <a href="#top">top</a> <a href="page">self</a>
+<a href="mailto:x@example.net">mail</a> <a href="/next">again</a>
+<a href="http://other.net/">other</a>"""
+
+
+class TestCandidates(unittest.TestCase):
+    def test_order_and_filtering(self):
+        base = URL("http://example.net/page")
+        urls = prefetch_candidates(HTMLParser(PAGE).parse(), base)
+
+        self.assertEqual(
+            [str(url) for url in urls],
+            [
+                "http://example.net/hint",
+                "http://example.net/next",
+                "http://other.net/",
+            ],
+        )
+
+    def test_limit(self):
+        body = "".join(f"<a href=/{i}>{i}</a>" for i in range(20))
+        urls = prefetch_candidates(HTMLParser(body).parse(), URL("http://a.net/"), 3)
+        self.assertEqual(len(urls), 3)
+
+
+class TestPrefetcher(unittest.TestCase):
+    def setUp(self):
+        headers = {"Cache-Control": "max-age=60"}
+        self.server, port = serve(
+            {
+                "/next": (200, headers, b"next page"),
+                "/slow": (200, headers, b"slow page", 5),
+            }
+        )
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.addCleanup(cache.clear)
+        self.origin = f"http://127.0.0.1:{port}"
+
+    def test_fills_cache(self):
+        prefetcher = Prefetcher()
+        page = HTMLParser('<a href="/next">next</a>').parse()
+        prefetcher.start(page, URL(self.origin + "/"))
+        prefetcher.thread.join(5)
+
+        entry = cache.get(self.origin + "/next")
+        self.assertEqual(entry.content, "next page")
+
+    def test_cancel(self):
+        prefetcher = Prefetcher()
+        page = HTMLParser('<a href="/slow">slow</a>').parse()
+        prefetcher.start(page, URL(self.origin + "/"))
+        start = time.monotonic()
+        prefetcher.cancel()
+
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertIsNone(prefetcher.thread)
+        self.assertIsNone(cache.get(self.origin + "/slow"))
@@ -0,0 +1,55 @@
+import unittest
+
+from src.browser import URL
+from src.data import errors
+from src.fetch import fetch_many
+from tests.server import Handler, serve
+
+
+class CountingHandler(Handler):
+    def do_GET(self):
+        self.hits.append(self.path)
+        super().do_GET()
+
+
+class TestRedirects(unittest.TestCase):
+    def setUp(self):
+        self.server, port = serve(
+            {
+                "/old": (301, {"Location": "/a/new"}, b""),
+                "/a/new": (302, {"Location": "../final"}, b""),
+                "/final": (200, {}, b"final"),
+                "/loop": (307, {"Location": "/loop"}, b""),
+                "/away": (302, {"Location": "file:///etc/passwd"}, b""),
+            }
+        )
+        self.server.RequestHandlerClass = type(
+            "Handler", (CountingHandler, self.server.RequestHandlerClass), {"hits": []}
+        )
+        self.hits = self.server.RequestHandlerClass.hits
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.origin = f"http://127.0.0.1:{port}"
+
+    def test_follows_redirects(self):
+        self.assertEqual(URL(self.origin + "/old").request(), "final")
+        self.assertEqual(self.hits, ["/old", "/a/new", "/final"])
+
+    def test_permanent_redirect_cache(self):
+        URL(self.origin + "/old").request()
+        URL(self.origin + "/old").request()
+
+        self.assertEqual(self.hits.count("/old"), 1)
+        self.assertEqual(self.hits.count("/a/new"), 2)
+
+    def test_too_many_redirects(self):
+        self.assertEqual(
+            URL(self.origin + "/loop").request(), errors.too_many_redirects
+        )
+
+    def test_invalid_redirect(self):
+        self.assertEqual(URL(self.origin + "/away").request(), errors.invalid_redirect)
+
+    def test_async_follows_redirects(self):
+        [(_, content)] = fetch_many([URL(self.origin + "/old")])
+        self.assertEqual(content, "final")
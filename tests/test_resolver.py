@@ -0,0 +1,53 @@
+import socket
+import unittest
+
+from src.resolver import Resolver, connect, interleave
+
+V4 = (socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP, "", ("127.0.0.1", 1))
+V6 = (socket.AF_INET6, socket.SOCK_STREAM, socket.IPPROTO_TCP, "", ("::1", 1, 0, 0))
+
+
+def closed_port():
+    s = socket.socket()
+    s.bind(("127.0.0.1", 0))
+    port = s.getsockname()[1]
+    s.close()
+    return port
+
+
+class TestResolver(unittest.TestCase):
+    def test_cache(self):
+        resolver = Resolver()
+        first = resolver.resolve("localhost", 80)
+        second = resolver.resolve("LOCALHOST", 80)
+
+        self.assertIs(first, second)
+        self.assertEqual((resolver.hits, resolver.misses), (1, 1))
+
+    def test_ttl(self):
+        resolver = Resolver(ttl=0)
+        resolver.resolve("localhost", 80)
+        resolver.resolve("localhost", 80)
+
+        self.assertEqual(resolver.misses, 2)
+
+    def test_interleave(self):
+        self.assertEqual(interleave([V6, V6, V6, V4]), [V6, V4, V6, V6])
+
+
+class TestConnect(unittest.TestCase):
+    def test_skips_dead_address(self):
+        server = socket.create_server(("127.0.0.1", 0))
+        self.addCleanup(server.close)
+        dead = V4[:4] + (("127.0.0.1", closed_port()),)
+        live = V4[:4] + (server.getsockname(),)
+
+        s = connect([dead, live], stagger=5)
+        self.addCleanup(s.close)
+        self.assertEqual(s.getpeername(), server.getsockname())
+        self.assertTrue(s.getblocking())
+
+    def test_all_dead(self):
+        dead = V4[:4] + (("127.0.0.1", closed_port()),)
+        with self.assertRaises(ConnectionRefusedError):
+            connect([dead])
@@ -0,0 +1,127 @@
+import socket
+import unittest
+
+from src.browser import URL
+from src.connection import pool
+from src.data import errors
+from src.response import (
+    ResponseReader,
+    ResponseTooLarge,
+    body_limits,
+    decode_body,
+    read_body,
+    sniff_charset,
+)
+from tests.server import serve
+
+TEXT = "<p>西遊記 journey to the west</p>" * 100
+
+
+class TestResponseReader(unittest.TestCase):
+    def reader(self, data, buffer_size=16):
+        a, b = socket.socketpair()
+        self.addCleanup(a.close)
+        self.addCleanup(b.close)
+        a.sendall(data)
+        a.shutdown(socket.SHUT_WR)
+        return ResponseReader(b, buffer_size)
+
+    def test_read_head(self):
+        response = self.reader(
+            b"HTTP/1.1 200 OK\r\nContent-Length: 5\r\nX-Long-Header: "
+            + b"x" * 40
+            + b"\r\n\r\nhello"
+        )
+        version, status, headers = response.read_head()
+
+        self.assertEqual(version, "HTTP/1.1")
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["content-length"], "5")
+        self.assertEqual(headers["x-long-header"], "x" * 40)
+
+    def test_stops_at_content_length(self):
+        response = self.reader(b"HTTP/1.1 200 OK\r\n\r\nhello world" + b"!" * 30)
+        response.read_head()
+
+        self.assertEqual(response.read(5), b"hello")
+        self.assertEqual(response.read(6), b" world")
+        self.assertEqual(b"".join(response.stream()), b"!" * 30)
+
+    def test_truncated_body(self):
+        response = self.reader(b"HTTP/1.1 200 OK\r\n\r\nhi")
+        response.read_head()
+
+        with self.assertRaises(ConnectionResetError):
+            response.read(5)
+
+
+class TestCharset(unittest.TestCase):
+    def test_content_type(self):
+        headers = {"content-type": 'text/html; charset="ISO-8859-1"'}
+        self.assertEqual(sniff_charset(headers, b""), "iso8859-1")
+        self.assertEqual(decode_body(headers, b"caf\xe9"), "café")
+
+    def test_meta_prescan(self):
+        body = '<meta charset="gbk"><p>西遊記</p>'.encode("gbk")
+        self.assertEqual(decode_body({}, body), '<meta charset="gbk"><p>西遊記</p>')
+
+    def test_fallback(self):
+        self.assertEqual(sniff_charset({}, b"<p>hi</p>"), "utf-8")
+        headers = {"content-type": "text/html; charset=nope"}
+        self.assertEqual(sniff_charset(headers, b""), "utf-8")
+        self.assertEqual(decode_body({}, b"\xff"), "�")
+
+
+class TestBodyLimits(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(setattr, body_limits, "memory", body_limits.memory)
+        self.addCleanup(setattr, body_limits, "maximum", body_limits.maximum)
+
+    def test_spills_to_disk(self):
+        body_limits.memory = 100
+        data = TEXT.encode("utf8")
+        chunks = [data[i : i + 7] for i in range(0, len(data), 7)]
+
+        self.assertEqual(read_body({}, chunks), TEXT)
+
+    def test_streamed_body_not_kept(self):
+        body_limits.memory = 100
+        data = TEXT.encode("utf8")
+
+        self.assertIsNone(read_body({}, [data[:50], data[50:]], streamed=True))
+        small = TEXT[:62].encode("utf8")
+        self.assertEqual(read_body({}, [small], streamed=True), TEXT[:62])
+
+    def test_streamed_request(self):
+        server, port = serve({"/": (200, {}, TEXT.encode("utf8"))})
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        body_limits.memory = 100
+
+        received = []
+        self.assertIsNone(URL(f"http://127.0.0.1:{port}/").request(received.append))
+        self.assertEqual("".join(received), TEXT)
+
+    def test_too_large(self):
+        body_limits.maximum = 100
+        with self.assertRaises(ResponseTooLarge):
+            read_body({}, [TEXT.encode("utf8")])
+
+    def test_error_page(self):
+        server, port = serve({"/": (200, {}, TEXT.encode("utf8"))})
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = URL(f"http://127.0.0.1:{port}/")
+        misses = pool.misses
+
+        body_limits.maximum = 2000
+        received = []
+        self.assertEqual(url.request(received.append), errors.response_too_large)
+        # Any text shown so far stays, followed by the error
+        self.assertEqual(received[-1], errors.response_too_large)
+        self.assertTrue(TEXT.startswith("".join(received[:-1])))
+
+        # The rest of the body was never read, so the connection is not reused
+        body_limits.maximum = len(TEXT) * 3
+        self.assertEqual(url.request(), TEXT)
+        self.assertEqual(pool.misses - misses, 2)
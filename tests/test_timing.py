@@ -0,0 +1,61 @@
+import json
+import os
+import tempfile
+import unittest
+
+from src.browser import URL
+from src.fetch import fetch_many
+from src.timing import timings
+from tests.server import serve
+
+
+class TestTiming(unittest.TestCase):
+    def setUp(self):
+        self.server, port = serve(
+            {"/": (200, {"Content-Type": "text/html"}, b"<p>timed</p>")}
+        )
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.addCleanup(timings.clear)
+        timings.clear()
+        self.url = f"http://127.0.0.1:{port}/"
+
+    def test_records_phases(self):
+        URL(self.url).request()
+        URL(self.url).request()
+        first, second = timings.get(self.url)
+
+        self.assertFalse(first.reused)
+        self.assertIsNotNone(first.dns)
+        self.assertIsNotNone(first.connect)
+        self.assertIsNone(first.ssl)
+        self.assertTrue(second.reused)
+        self.assertIsNone(second.connect)
+        for timing in [first, second]:
+            self.assertEqual(timing.status, 200)
+            self.assertGreater(timing.wait, 0)
+            self.assertEqual(timing.body_bytes, len(b"<p>timed</p>"))
+            self.assertGreater(timing.header_bytes, 0)
+            self.assertGreater(timing.request_bytes, 0)
+
+    def test_async_fetch(self):
+        fetch_many([URL(self.url)])
+        (timing,) = timings.get(self.url)
+        self.assertEqual(timing.status, 200)
+        self.assertIsNotNone(timing.connect)
+
+    def test_har(self):
+        URL(self.url).request()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "timings.har")
+            timings.write_har(path)
+            with open(path) as file:
+                har = json.load(file)
+
+        self.assertEqual(har["log"]["version"], "1.2")
+        (entry,) = har["log"]["entries"]
+        self.assertEqual(entry["request"]["url"], self.url)
+        self.assertEqual(entry["response"]["status"], 200)
+        self.assertEqual(entry["response"]["content"]["mimeType"], "text/html")
+        self.assertEqual(entry["timings"]["ssl"], -1)
+        self.assertGreaterEqual(entry["time"], entry["timings"]["wait"])
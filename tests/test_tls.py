@@ -0,0 +1,42 @@
+import os
+import ssl
+import unittest
+
+from src.browser import URL
+from src.tls import tls
+from tests.server import serve
+
+CERT = os.path.join(os.path.dirname(__file__), "certs", "localhost.pem")
+
+
+class TestTLS(unittest.TestCase):
+    def setUp(self):
+        server_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        server_context.load_cert_chain(CERT)
+        self.server, port = serve({"/": (200, {"Connection": "close"}, b"secure")})
+        self.server.socket = server_context.wrap_socket(
+            self.server.socket, server_side=True
+        )
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = f"https://localhost:{port}/"
+
+        self.addCleanup(setattr, tls, "contexts", tls.contexts)
+        self.addCleanup(setattr, tls, "cafile", tls.cafile)
+        tls.contexts = {}
+        tls.cafile = CERT
+
+    def test_session_resumption(self):
+        full, resumed = tls.full, tls.resumed
+        self.assertEqual(URL(self.url).request(), "secure")
+        self.assertEqual(URL(self.url).request(), "secure")
+
+        self.assertEqual(tls.full - full, 1)
+        self.assertEqual(tls.resumed - resumed, 1)
+        self.assertGreater(tls.handshake_time, 0)
+
+    def test_shared_context(self):
+        context = tls.get_context()
+        URL(self.url).request()
+
+        self.assertIs(tls.get_context(), context)
@@ -0,0 +1,95 @@
+import io
+import unittest
+
+from src.tokenizer import (
+    Characters,
+    Comment,
+    EndTag,
+    HTMLTokenizer,
+    StartTag,
+    iter_tokens,
+    sax_parse,
+)
+
+PAGE = (
+    "<!doctype html><html><head><title>T &amp; T</title></head>"
+    "<body><!-- note --><a href='/next'>next</a></body></html>"
+)
+TOKENS = [
+    StartTag("html", {}),
+    StartTag("head", {}),
+    StartTag("title", {}),
+    Characters("T & T"),
+    EndTag("title"),
+    EndTag("head"),
+    StartTag("body", {}),
+    Comment(" note "),
+    StartTag("a", {"href": "/next"}),
+    Characters("next"),
+    EndTag("a"),
+    EndTag("body"),
+    EndTag("html"),
+]
+
+
+class Recorder:
+    def __init__(self):
+        self.events = []
+
+    def start_tag(self, tag, attributes):
+        self.events.append(("start", tag))
+
+    def end_tag(self, tag):
+        self.events.append(("end", tag))
+        return tag == "head"
+
+
+class TestTokenizer(unittest.TestCase):
+    def test_tokens(self):
+        self.assertEqual(list(iter_tokens(PAGE)), TOKENS)
+
+    def test_every_split_point(self):
+        for i in range(len(PAGE) + 1):
+            self.assertEqual(list(iter_tokens([PAGE[:i], PAGE[i:]])), TOKENS, i)
+
+    def test_file(self):
+        self.assertEqual(list(iter_tokens(io.StringIO(PAGE))), TOKENS)
+
+    def test_lazy(self):
+        def chunks():
+            yield "<html><head><title>T</title></head>"
+            raise AssertionError("read past the head")
+
+        for token in iter_tokens(chunks()):
+            if token == EndTag("head"):
+                break
+
+    def test_unclosed_comment(self):
+        tokenizer = HTMLTokenizer()
+        self.assertEqual(tokenizer.feed("a<!-- never"), [Characters("a")])
+        self.assertEqual(tokenizer.close(), [Comment(" never")])
+
+    def test_feed_without_reading(self):
+        tokenizer = HTMLTokenizer()
+        first = tokenizer.feed("<p>one</p>")
+        tokenizer.feed("<p>two")
+        self.assertEqual(first[1], Characters("one"))
+        self.assertEqual(tokenizer.close(), [Characters("two")])
+
+    def test_sax(self):
+        def chunks():
+            yield PAGE[:60]
+            raise AssertionError("read past the head")
+
+        handler = Recorder()
+        sax_parse(chunks(), handler)
+        self.assertEqual(
+            handler.events,
+            [
+                ("start", "html"),
+                ("start", "head"),
+                ("start", "title"),
+                ("end", "title"),
+                ("end", "head"),
+            ],
+        )
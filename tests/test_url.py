@@ -1,6 +1,8 @@
+import base64
 import unittest
 
 from src.browser import URL
+from src.data import errors
 
 
 class TestUrl(unittest.TestCase):
@@ -26,9 +28,107 @@ class TestUrl(unittest.TestCase):
         self.assertEqual(url.scheme, "data")
         self.assertEqual(url.data, content)
 
+    def test_data_url_with_commas(self):
+        url = URL("data:text/html,<p>one, two, three</p>")
+
+        self.assertEqual(url.request(), "<p>one, two, three</p>")
+
+    def test_data_url_percent_encoded(self):
+        url = URL("data:,a%20b%2C%E8%A5%BF")
+
+        self.assertEqual(url.request(), "a b,西")
+
+    def test_data_url_base64(self):
+        content = "<p>西遊記</p>".encode("utf8") * 100_000
+        payload = base64.b64encode(content).decode("ascii")
+        url = URL(f"data:text/html;charset=utf-8;base64,{payload}")
+
+        self.assertEqual(url.request(), content.decode("utf8"))
+
+    def test_data_url_charset(self):
+        payload = base64.b64encode("café".encode("latin-1")).decode("ascii")
+        url = URL(f"data:text/plain;charset=iso-8859-1;base64,{payload}")
+
+        self.assertEqual(url.request(), "café")
+
+    def test_data_url_literal_text(self):
+        url = URL("data:text/plain;charset=iso-8859-1,café")
+
+        self.assertEqual(url.request(), "café")
+
+    def test_data_url_invalid(self):
+        self.assertEqual(URL("data:text/html").request(), errors.invalid_url)
+        self.assertEqual(URL("data:;base64,abc").request(), errors.invalid_url)
+
     def test_http_url(self):
         url = URL("http://example.net")
 
         self.assertEqual(url.scheme, "http")
         self.assertEqual(url.path, "/")
         self.assertEqual(url.port, 80)
+
+    def test_resolve(self):
+        url = URL("http://example.net/a/b/page.html")
+
+        self.assertEqual(
+            str(url.resolve("other.html")), "http://example.net/a/b/other.html"
+        )
+        self.assertEqual(str(url.resolve("../up.html")), "http://example.net/a/up.html")
+        self.assertEqual(str(url.resolve("/root")), "http://example.net/root")
+        self.assertEqual(str(url.resolve("//cdn.net/x")), "http://cdn.net/x")
+        self.assertEqual(str(url.resolve("https://other.net")), "https://other.net/")
+
+    def test_resolve_rfc3986(self):
+        # RFC 3986 section 5.4, without fragments, which are never sent
+        base = URL("http://a/b/c/d;p?q")
+        examples = {
+            "g": "http://a/b/c/g",
+            "./g": "http://a/b/c/g",
+            "g/": "http://a/b/c/g/",
+            "/g": "http://a/g",
+            "//g": "http://g/",
+            "?y": "http://a/b/c/d;p?y",
+            "g?y": "http://a/b/c/g?y",
+            "#s": "http://a/b/c/d;p?q",
+            "g#s": "http://a/b/c/g",
+            ";x": "http://a/b/c/;x",
+            "": "http://a/b/c/d;p?q",
+            ".": "http://a/b/c/",
+            "..": "http://a/b/",
+            "../g": "http://a/b/g",
+            "../..": "http://a/",
+            "../../../g": "http://a/g",
+            "/./g": "http://a/g",
+            "g.": "http://a/b/c/g.",
+            "g;x=1/../y": "http://a/b/c/y",
+        }
+        for reference, expected in examples.items():
+            self.assertEqual(str(base.resolve(reference)), expected, reference)
+
+    def test_normalization(self):
+        url = URL("HTTP://Example.NET:80/a/./b/../c/%7euser/%2f?x=%2a#top")
+
+        self.assertEqual(str(url), "http://example.net/a/c/~user/%2F?x=%2A")
+        self.assertEqual(url, URL("http://example.net/a/c/~user/%2F?x=%2A"))
+        self.assertEqual(
+            len({url, URL("http://example.net:80/a/c/~user/%2F?x=%2A")}), 1
+        )
+        self.assertNotEqual(url, URL("https://example.net/a/c/~user/%2F?x=%2A"))
+
+    def test_query_without_path(self):
+        url = URL("http://example.net?q=1")
+
+        self.assertEqual(url.host, "example.net")
+        self.assertEqual(url.path, "/?q=1")
+
+    def test_invalid_port(self):
+        self.assertEqual(URL("http://example.net:abc/").error, errors.invalid_url)
+
+    def test_resolve_is_cached(self):
+        base = URL("http://example.net/a/page.html")
+
+        self.assertIs(base.resolve("other.html"), base.resolve("other.html"))
+
+    def test_slots(self):
+        with self.assertRaises(AttributeError):
+            URL("http://example.net").title = "not a URL attribute"